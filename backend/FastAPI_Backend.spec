@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('src/*.py', 'src/'), ('static/*', 'static/')],
-    hiddenimports=['uvicorn.loops.auto', 'uvicorn.protocols.http.auto', 'uvicorn.protocols.websockets.auto', 'src.app', 'src.routes', 'src.services', 'src.schemas', 'src.supabase_client', 'src.crypto_utils'],
+    hiddenimports=['uvicorn.loops.auto', 'uvicorn.protocols.http.auto', 'uvicorn.protocols.websockets.auto', 'src.app', 'src.routes', 'src.services', 'src.schemas', 'src.supabase_client', 'src.crypto_utils', 'src.migrations', 'src.database', 'src.events', 'src.static_assets', 'src.metrics', 'src.query_stats', 'src.report_jobs', 'xlsxwriter', 'cryptography.fernet', 'aiosqlite', 'sqlalchemy.dialects.sqlite.aiosqlite'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
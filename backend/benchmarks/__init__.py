@@ -0,0 +1,2 @@
+# Benchmarks for the backend. Run from the backend folder, e.g.
+#   python -m benchmarks.bench_concurrency
@@ -0,0 +1,80 @@
+# Shared helpers for the benchmark scripts: throwaway databases and an
+# authenticated in-process client for the FastAPI app.
+
+import os
+import random
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from dataclasses import replace
+from typing import AsyncIterator
+
+import httpx
+from sqlmodel import Session
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-not-for-production-use")
+
+from src.app import app
+from src.database import initialize_engine, create_db_and_tables, get_engine, SQLiteProfile
+from src.models import Resignee, Account
+from benchmarks.dataset import DatasetSpec, resignee_row, write_rows
+from src.crypto_utils import encryption_enabled
+from src.migrations import encrypt_plaintext_rows
+
+BENCH_USER = "bench"
+BENCH_PASSWORD = "bench"
+
+
+def make_resignee(i: int, rng: random.Random, unprocessed_ratio: float = 0.3) -> Resignee:
+    return Resignee(**resignee_row(i, rng, DatasetSpec(rows=1, processed_ratio=1 - unprocessed_ratio)))
+
+
+def make_database(rows: int, unprocessed_ratio: float = 0.3, seed: int = 0, profile: SQLiteProfile | None = None) -> str:
+    """Create a tracker database with `rows` synthetic resignees and a benchmark login."""
+    path = os.path.join(tempfile.mkdtemp(prefix="resignee-bench-"), "tracker.db")
+    # Statement logging would drown out the results
+    initialize_engine(path, replace(profile or SQLiteProfile.from_env(), echo=False))
+    create_db_and_tables()
+    with Session(get_engine()) as session:
+        session.add(Account(username=BENCH_USER, password=BENCH_PASSWORD))
+        session.commit()
+    write_rows(get_engine(), DatasetSpec(rows=rows, processed_ratio=1 - unprocessed_ratio, seed=seed))
+    if encryption_enabled():
+        encrypt_plaintext_rows(get_engine())
+    return path
+
+
+@asynccontextmanager
+async def client() -> AsyncIterator[httpx.AsyncClient]:
+    """An httpx client that drives the app in-process and is already logged in."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost:8000", timeout=None) as c:
+        res = await c.post("/login", data={"username": BENCH_USER, "password": BENCH_PASSWORD})
+        res.raise_for_status()
+        yield c
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def summarize(label: str, samples: list[float]) -> str:
+    return (
+        f"{label:<28} n={len(samples):<5} "
+        f"p50={percentile(samples, 50) * 1000:8.2f}ms "
+        f"p99={percentile(samples, 99) * 1000:8.2f}ms "
+        f"max={max(samples, default=0) * 1000:8.2f}ms"
+    )
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
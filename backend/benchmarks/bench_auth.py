@@ -0,0 +1,71 @@
+"""
+Per-request overhead of auth_middleware on /resignees routes.
+
+Calls the middleware directly with a no-op downstream handler, comparing a
+warm token cache against decoding the JWT on every request (cache cleared
+before each call).
+
+    python -m benchmarks.bench_auth --requests 20000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-not-for-production-use")
+
+import jwt
+from fastapi.requests import Request
+from fastapi.responses import Response
+
+from src.app import auth_middleware, token_cache
+
+
+def make_request(token: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/resignees",
+        "query_string": b"",
+        "headers": [(b"cookie", f'access_token="Bearer {token}"'.encode())],
+    })
+
+
+async def call_next(request: Request) -> Response:
+    return Response(status_code=204)
+
+
+async def measure(requests: int, cached: bool) -> float:
+    token = jwt.encode(
+        {"sub": "bench", "exp": datetime.now() + timedelta(hours=12)},
+        os.environ["JWT_SECRET_KEY"], "HS256"
+    )
+    token_cache.clear()
+    start = time.perf_counter()
+    for _ in range(requests):
+        if not cached:
+            token_cache.clear()
+        response = await auth_middleware(make_request(token), call_next)
+        assert response.status_code == 204
+    return (time.perf_counter() - start) / requests
+
+
+async def run(requests: int) -> None:
+    uncached = await measure(requests, cached=False)
+    cached = await measure(requests, cached=True)
+    print(f"requests={requests}")
+    print(f"decode every request  {uncached * 1e6:8.2f} us/request")
+    print(f"token cache           {cached * 1e6:8.2f} us/request  ({uncached / cached:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
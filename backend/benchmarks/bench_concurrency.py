@@ -0,0 +1,67 @@
+"""
+Dashboard latency while a large report export is running.
+
+Polls GET /resignees on an otherwise idle server, then again while a
+/resignees/report export over the whole table is in flight. With the async
+database path the two distributions should stay close; with blocking
+handlers the second one stretches to the length of the export.
+
+    python -m benchmarks.bench_concurrency --rows 100000 --format csv
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks._common import make_database, client, summarize
+
+
+async def poll_dashboard(c, stop: asyncio.Event, samples: list[float], interval: float) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        res = await c.get("/resignees")
+        res.raise_for_status()
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+
+
+async def run(rows: int, fmt: str, idle_requests: int, interval: float) -> None:
+    make_database(rows, unprocessed_ratio=0.005)
+
+    async with client() as c:
+        idle: list[float] = []
+        for _ in range(idle_requests):
+            start = time.perf_counter()
+            (await c.get("/resignees")).raise_for_status()
+            idle.append(time.perf_counter() - start)
+            await asyncio.sleep(interval)
+
+        busy: list[float] = []
+        stop = asyncio.Event()
+        poller = asyncio.create_task(poll_dashboard(c, stop, busy, interval))
+        start = time.perf_counter()
+        res = await c.get("/resignees/report", params={
+            "start_date": "2000-01-01", "end_date": "2100-01-01", "format": fmt
+        })
+        export_time = time.perf_counter() - start
+        stop.set()
+        await poller
+        res.raise_for_status()
+
+    print(f"rows={rows} format={fmt} export={export_time:.2f}s size={len(res.content)} bytes")
+    print(summarize("GET /resignees idle", idle))
+    print(summarize("GET /resignees during export", busy))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--idle-requests", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.format, args.idle_requests, args.interval))
+
+
+if __name__ == "__main__":
+    main()
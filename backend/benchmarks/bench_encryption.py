@@ -0,0 +1,62 @@
+"""
+GET /resignees latency with PII encryption off vs on.
+
+Each mode runs in its own subprocess (ENCRYPT_PII is read when the database
+is seeded and on every request) against an identical generated dataset, so
+the difference is the cost of decrypting the page's PII columns.
+
+    python -m benchmarks.bench_encryption --rows 20000 --requests 50
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from cryptography.fernet import Fernet
+
+
+async def measure(rows: int, requests: int, limit: int) -> None:
+    from benchmarks._common import make_database, client, summarize
+
+    # Mostly unprocessed rows so every page is full of PII to decrypt
+    make_database(rows, unprocessed_ratio=0.9)
+    samples: list[float] = []
+    async with client() as c:
+        (await c.get("/resignees", params={"limit": limit})).raise_for_status()
+        for _ in range(requests):
+            start = time.perf_counter()
+            res = await c.get("/resignees", params={"limit": limit})
+            res.raise_for_status()
+            samples.append(time.perf_counter() - start)
+    mode = "on" if os.environ.get("ENCRYPT_PII") == "1" else "off"
+    print(summarize(f"encryption {mode} (limit={limit})", samples), flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--mode", choices=["off", "on"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        asyncio.run(measure(args.rows, args.requests, args.limit))
+        return
+
+    print(f"rows={args.rows} requests={args.requests}")
+    key = Fernet.generate_key().decode()
+    for mode in ("off", "on"):
+        env = dict(os.environ, FERNET_KEY=key, ENCRYPT_PII="1" if mode == "on" else "0")
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_encryption", "--mode", mode,
+             "--rows", str(args.rows), "--requests", str(args.requests), "--limit", str(args.limit)],
+            env=env, check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Throughput of POST /resignees for large pastes.
+
+Builds an email-style paste of --rows employees (a --dup-ratio share of which
+already exist or repeat inside the paste) and posts it to a fresh database.
+
+    python -m benchmarks.bench_ingest --rows 10000
+"""
+
+import argparse
+import asyncio
+
+from benchmarks._common import make_database, client, Timer
+from benchmarks.dataset import build_paste
+
+
+async def run(rows: int, existing: int, dup_ratio: float) -> None:
+    make_database(existing)
+    paste = build_paste(rows, existing=existing, dup_ratio=dup_ratio)
+
+    async with client() as c:
+        with Timer() as t:
+            res = await c.post("/resignees", content=paste, headers={"Content-Type": "text/plain"})
+        res.raise_for_status()
+        body = res.json()
+
+    print(f"rows={rows} existing={existing} paste={len(paste)} bytes")
+    print(f"added={len(body['added'])} rejected={len(body['rejected'])}")
+    print(f"elapsed={t.elapsed:.3f}s throughput={rows / t.elapsed:,.0f} rows/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--existing", type=int, default=10_000, help="rows already in the database")
+    parser.add_argument("--dup-ratio", type=float, default=0.02)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.existing, args.dup_ratio))
+
+
+if __name__ == "__main__":
+    main()
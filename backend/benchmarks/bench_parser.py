@@ -0,0 +1,58 @@
+"""
+Parser throughput and memory for large pastes.
+
+Feeds synthetic email text to ResigneeTextParser in 64 KiB chunks produced
+on the fly, so the text itself is never held in memory, and reports
+records/second and the tracemalloc peak for each size. The peak should stay
+roughly the same as the record count grows.
+
+    python -m benchmarks.bench_parser --records 10000 100000 1000000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from src.schemas import ResigneeParseError
+from src.services import parse_resignee_text
+from benchmarks.dataset import paste_chunks
+
+
+def parse_all(records: int, malformed_ratio: float) -> tuple[int, int]:
+    parsed = errors = 0
+    for item in parse_resignee_text(paste_chunks(records, malformed_ratio=malformed_ratio)):
+        if isinstance(item, ResigneeParseError):
+            errors += 1
+        else:
+            parsed += 1
+    return parsed, errors
+
+
+def run(records: int, malformed_ratio: float) -> None:
+    # Timed and traced separately; tracemalloc slows parsing down several times
+    start = time.perf_counter()
+    parsed, errors = parse_all(records, malformed_ratio)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    parse_all(records, malformed_ratio)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"records={records:<9} parsed={parsed:<9} errors={errors:<6} "
+        f"{records / elapsed:>12,.0f} records/s  peak={peak / 1024:,.0f} KiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--malformed-ratio", type=float, default=0.01)
+    args = parser.parse_args()
+    for records in args.records:
+        run(records, args.malformed_ratio)
+
+
+if __name__ == "__main__":
+    main()
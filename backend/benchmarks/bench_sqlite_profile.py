@@ -0,0 +1,96 @@
+"""
+Mixed read/write throughput with the legacy SQLite settings vs the tuned profile.
+
+Readers page through GET /resignees and an exporter streams full CSV
+reports back to back, while writers update remarks and deactivation dates,
+all against the same database for a fixed time. With a rollback journal a
+streaming export holds a shared lock that stalls every commit until it
+finishes; in WAL mode writers carry on. The legacy profile is what the app used before (rollback journal,
+synchronous=FULL, default cache, no mmap); the tuned one is
+SQLiteProfile's defaults (WAL, synchronous=NORMAL, mmap, larger cache).
+
+    python -m benchmarks.bench_sqlite_profile --rows 20000 --seconds 10
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks._common import make_database, client, summarize
+from src.database import SQLiteProfile, LEGACY_PROFILE
+
+
+async def reader(c, stop: asyncio.Event, samples: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        (await c.get("/resignees", params={"limit": 100})).raise_for_status()
+        samples.append(time.perf_counter() - start)
+
+
+async def exporter(c, stop: asyncio.Event, samples: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        (await c.get("/resignees/report", params={
+            "start_date": "2000-01-01", "end_date": "2100-01-01", "format": "csv"
+        })).raise_for_status()
+        samples.append(time.perf_counter() - start)
+
+
+async def writer(c, stop: asyncio.Event, samples: list[float], employee_nos: list[str], seed: int) -> None:
+    rng = random.Random(seed)
+    while not stop.is_set():
+        employee_no = rng.choice(employee_nos)
+        start = time.perf_counter()
+        if rng.random() < 0.5:
+            res = await c.put(f"/resignees/{employee_no}/remarks", content=f"note {rng.random()}",
+                              headers={"content-type": "text/plain"})
+        else:
+            res = await c.put(f"/resignees/{employee_no}/um", content=f"2025-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+                              headers={"content-type": "text/plain"})
+        res.raise_for_status()
+        samples.append(time.perf_counter() - start)
+
+
+async def measure(label: str, profile: SQLiteProfile, rows: int, readers: int, exporters: int, writers: int, seconds: float) -> None:
+    make_database(rows, unprocessed_ratio=0.3, profile=profile)
+    async with client() as c:
+        employee_nos = [r["employee_no"] for r in (await c.get("/resignees", params={"limit": 500})).json()]
+        reads: list[float] = []
+        exports: list[float] = []
+        writes: list[float] = []
+        stop = asyncio.Event()
+        tasks = [asyncio.create_task(reader(c, stop, reads)) for _ in range(readers)]
+        tasks += [asyncio.create_task(exporter(c, stop, exports)) for _ in range(exporters)]
+        tasks += [asyncio.create_task(writer(c, stop, writes, employee_nos, seed)) for seed in range(writers)]
+        await asyncio.sleep(seconds)
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    total = len(reads) + len(exports) + len(writes)
+    print(f"{label}: {total / seconds:8.1f} ops/s ({len(reads) / seconds:.1f} reads/s, "
+          f"{len(writes) / seconds:.1f} writes/s, {len(exports)} exports)")
+    print("  " + summarize("reads", reads))
+    print("  " + summarize("writes", writes))
+    print("  " + summarize("exports", exports))
+
+
+async def run(rows: int, readers: int, exporters: int, writers: int, seconds: float) -> None:
+    print(f"rows={rows} readers={readers} exporters={exporters} writers={writers} seconds={seconds}")
+    await measure("legacy", LEGACY_PROFILE, rows, readers, exporters, writers, seconds)
+    await measure("tuned ", SQLiteProfile(), rows, readers, exporters, writers, seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--exporters", type=int, default=1)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.readers, args.exporters, args.writers, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
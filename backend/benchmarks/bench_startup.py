@@ -0,0 +1,100 @@
+"""
+Cold-start profile of the backend.
+
+Reports (1) `python -X importtime` for `import src.app`: total time and the
+most expensive modules, and (2) wall time from launching uvicorn to the
+first answered request for the dashboard page, which is what the desktop
+window waits on behind the splash screen. Each is measured in fresh
+processes, best of --runs. Pass --budget-ms to fail (exit 1) when the import
+time regresses past it.
+
+    python -m benchmarks.bench_startup --runs 5 --top 15
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the app should only load on demand
+LAZY_MODULES = ("xlsxwriter", "cryptography.fernet")
+
+
+def import_profile() -> tuple[float, list[tuple[str, int, int]]]:
+    """(total seconds, [(module, self_us, cumulative_us)]) for one fresh `import src.app`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.app"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    total = next(cumulative for name, _, cumulative in modules if name == "src.app")
+    return total / 1e6, modules
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_page(timeout: float = 60.0) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", f"import uvicorn; uvicorn.run('src.app:app', host='127.0.0.1', port={port}, log_level='warning')"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/dashboard", timeout=1) as res:
+                    res.read()
+                    return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("server did not answer in time")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    total, modules = min(profiles, key=lambda p: p[0])
+    print(f"import src.app: {total * 1000:.0f} ms (best of {args.runs})")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for name, self_us, cumulative_us in sorted(modules, key=lambda m: -m[2])[:args.top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:8.1f}  {name}")
+
+    loaded = {name for name, _, _ in modules}
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    print(f"lazy modules loaded at import: {', '.join(eager) if eager else 'none'}")
+
+    first_page = min(time_to_first_page() for _ in range(args.runs))
+    print(f"launch to first /dashboard response: {first_page * 1000:.0f} ms (best of {args.runs})")
+
+    if args.budget_ms is not None and total * 1000 > args.budget_ms:
+        print(f"import time over budget ({args.budget_ms:.0f} ms)")
+        sys.exit(1)
+    if eager:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Peak RSS and wall time of XLSX report generation.
+
+Runs each mode in a fresh subprocess so ru_maxrss is not polluted by the
+other one:
+
+  legacy    the old path: every report row built up front, an in-memory
+            workbook in a BytesIO, autofit(), then read back out
+  streaming XlsxReportWriter in constant_memory mode, fed in
+            REPORT_BATCH_SIZE batches and written to a temp file
+
+    python -m benchmarks.bench_xlsx --rows 100000
+"""
+
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+from typing import Any, Iterator
+
+import xlsxwriter
+
+from benchmarks._common import make_resignee
+from src.crypto_utils import ENCRYPTED_FIELDS
+from src.models import Resignee
+from src.routes import REPORT_BATCH_SIZE
+from src.services import XlsxReportWriter, build_report_data, headers
+
+
+def generate_resignees(rows: int) -> Iterator[list[Resignee]]:
+    rng = random.Random(0)
+    for start in range(0, rows, REPORT_BATCH_SIZE):
+        yield [make_resignee(i, rng) for i in range(start, min(rows, start + REPORT_BATCH_SIZE))]
+
+
+def plaintext_pii(resignees: list[Resignee]) -> list[dict[str, Any]]:
+    # The rows are never encrypted here, so the PII is read straight off them
+    return [{field: getattr(r, field) for field in ENCRYPTED_FIELDS} for r in resignees]
+
+
+def legacy_workbook(data: list[dict[str, Any]]) -> bytes:
+    # Same cells as XlsxReportWriter, but held in memory and autofitted
+    file = BytesIO()
+    workbook = xlsxwriter.Workbook(file)
+    worksheet = workbook.add_worksheet()
+    writer = XlsxReportWriter.__new__(XlsxReportWriter)
+    writer.workbook, writer.worksheet = workbook, worksheet
+    writer.header_format = workbook.add_format({'bold': True})
+    writer.late_format = workbook.add_format({'bg_color': "#F9808E"})
+    writer.processed_format = workbook.add_format({'bg_color': "#2BFF00", 'bold': True})
+    writer.unprocessed_format = workbook.add_format({'bg_color': "#FF5500", 'bold': True})
+    writer.widths = [len(header) for header in headers]
+    writer.rows_written = 0
+    worksheet.write_row(0, 0, headers, writer.header_format)
+    writer.write_rows(data)
+    worksheet.autofit()
+    workbook.close()
+    file.seek(0)
+    return file.read()
+
+
+def run_mode(mode: str, rows: int) -> None:
+    start = time.perf_counter()
+    if mode == "legacy":
+        resignees = [r for batch in generate_resignees(rows) for r in batch]
+        size = len(legacy_workbook(build_report_data(resignees, plaintext_pii(resignees))))
+    else:
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        writer = XlsxReportWriter(path)
+        for batch in generate_resignees(rows):
+            writer.write_rows(build_report_data(batch, plaintext_pii(batch)))
+        writer.close()
+        size = os.path.getsize(path)
+        os.remove(path)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_mib = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    print(f"{mode:<10} rows={rows:<8} time={elapsed:7.2f}s peak_rss={peak_mib:8.1f} MiB size={size} bytes")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--mode", choices=["legacy", "streaming"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.rows)
+        return
+
+    for mode in ("legacy", "streaming"):
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_xlsx", "--rows", str(args.rows), "--mode", mode],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Synthetic tracker data for the benchmarks.
+
+Resignee rows follow the shapes seen in real tracker files: tenure is
+long-tailed, HR usually emails a few days before the last day (sometimes
+after it), deactivations land around the last day with a tail of late ones,
+some accounts never existed, and older rows are far more likely to be
+processed than recent ones. Pastes mimic the HR emails that POST /resignees
+parses, with optional duplicates and malformed records.
+
+    python -m benchmarks.dataset tracker.db --rows 100000
+    python -m benchmarks.dataset paste.txt --paste 5000 --malformed-ratio 0.01
+"""
+
+import argparse
+import os
+import random
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta
+from typing import Any, Iterator
+
+from sqlalchemy import Engine
+
+from src.database import initialize_engine, create_db_and_tables, get_engine, SQLiteProfile
+from src.models import Resignee
+from src.services import compute_late_flags
+
+# "No Existing Account" is stored as a sentinel date before 2020-01-01
+NO_ACCOUNT = date(1900, 1, 1)
+DEACTIVATION_COLUMNS = ("um_date_deac", "tp_date_deac", "email_date_deac", "windows_date_deac")
+# Share of resignees that never had each account
+NO_ACCOUNT_RATIO = {"um_date_deac": 0.03, "tp_date_deac": 0.35, "email_date_deac": 0.02, "windows_date_deac": 0.05}
+
+POSITIONS = ["Teller", "Analyst", "Officer", "Manager", "Associate", "Specialist", "Clerk"]
+RANKS = ["Staff", "Senior", "Supervisor", "AVP", "VP", "SVP"]
+INSERT_BATCH_SIZE = 5000
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    rows: int
+    # Overall share of processed rows; recent rows are processed less often
+    processed_ratio: float = 0.7
+    first_last_day: date = date(2020, 1, 1)
+    last_last_day: date = date(2025, 12, 31)
+    departments: int = 60
+    cost_centers: int = 150
+    seed: int = 0
+
+
+def resignee_row(i: int, rng: random.Random, spec: DatasetSpec) -> dict[str, Any]:
+    """Column values for resignee number `i`, late flags included."""
+    span = (spec.last_last_day - spec.first_last_day).days
+    age = rng.random()
+    last_day = spec.first_last_day + timedelta(days=int(span * (1 - age)))
+    tenure_days = int(min(max(rng.lognormvariate(7.3, 0.8), 90), 30 * 365))
+
+    # Mostly emailed ahead of the last day, sometimes on the day or after it
+    roll = rng.random()
+    if roll < 0.7:
+        hr_offset = -rng.randint(1, 14)
+    elif roll < 0.9:
+        hr_offset = rng.randint(0, 3)
+    else:
+        hr_offset = rng.randint(4, 30)
+    date_hr_emailed = datetime.combine(last_day + timedelta(days=hr_offset), datetime.min.time()) + timedelta(
+        hours=rng.randint(8, 17), minutes=rng.randint(0, 59)
+    )
+
+    # Older rows are processed far more often than the last few months' ones;
+    # P(processed) = age ** k averages to processed_ratio over uniform ages
+    if spec.processed_ratio <= 0:
+        processed = False
+    else:
+        processed = rng.random() < age ** (1 / spec.processed_ratio - 1)
+    deacs: dict[str, date | None] = {}
+    for column in DEACTIVATION_COLUMNS:
+        if rng.random() < NO_ACCOUNT_RATIO[column]:
+            deacs[column] = NO_ACCOUNT
+        elif processed or rng.random() < 0.6:
+            # Around the last day, with a long tail of late deactivations
+            delay = rng.randint(-2, 2) if rng.random() < 0.8 else rng.randint(3, 45)
+            deacs[column] = last_day + timedelta(days=delay)
+        else:
+            deacs[column] = None
+
+    processed_date_time = None
+    if processed:
+        done = max(d for d in deacs.values() if d is not None)
+        processed_date_time = datetime.combine(max(done, last_day), datetime.min.time()) + timedelta(
+            days=rng.randint(0, 5), hours=rng.randint(8, 18)
+        )
+
+    return {
+        "employee_no": f"{i:08d}",
+        "date_hired": last_day - timedelta(days=tenure_days),
+        "cost_center": f"CC{rng.randrange(spec.cost_centers) + 100}",
+        "last_name": f"Last{i}",
+        "first_name": f"First{i}",
+        "middle_name": f"Middle{i}",
+        "position_title": rng.choice(POSITIONS),
+        "rank": rng.choice(RANKS),
+        "department": f"Dept {rng.randrange(spec.departments) + 1}",
+        "last_day": last_day,
+        "date_hr_emailed": date_hr_emailed,
+        "processed_date_time": processed_date_time,
+        **deacs,
+        "remarks": "Pending clearance" if rng.random() < 0.05 else None,
+        **compute_late_flags(last_day, date_hr_emailed, deacs),
+    }
+
+
+def resignee_rows(spec: DatasetSpec, start: int = 0) -> Iterator[dict[str, Any]]:
+    rng = random.Random(spec.seed)
+    for i in range(start, start + spec.rows):
+        yield resignee_row(i, rng, spec)
+
+
+def write_rows(engine: Engine, spec: DatasetSpec) -> None:
+    """Bulk-insert the dataset into an initialized tracker database, in one transaction."""
+    # Core insert on a plain connection: the ORM bulk path costs several times more per row
+    statement = Resignee.__table__.insert()
+    with engine.begin() as connection:
+        batch: list[dict[str, Any]] = []
+        for row in resignee_rows(spec):
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH_SIZE:
+                connection.execute(statement, batch)
+                batch.clear()
+        if batch:
+            connection.execute(statement, batch)
+
+
+def paste_records(
+    count: int,
+    seed: int = 0,
+    existing: int = 0,
+    dup_ratio: float = 0.0,
+    malformed_ratio: float = 0.0,
+    prefix: str = "P",
+) -> Iterator[str]:
+    """
+    One email-style record at a time: every field followed by a blank line.
+    A dup_ratio share repeats an employee already in the database (numbered
+    below `existing`) or one from earlier in the paste; a malformed_ratio
+    share has a field missing.
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        if rng.random() < dup_ratio:
+            if existing and rng.random() < 0.5:
+                employee_no = f"{rng.randrange(existing):08d}"
+            else:
+                employee_no = f"{prefix}{rng.randrange(max(i, 1)):07d}"
+        else:
+            employee_no = f"{prefix}{i:07d}"
+        last_day = date(2025, 1, 1) + timedelta(days=rng.randint(0, 364))
+        hired = last_day - timedelta(days=rng.randint(90, 9000))
+        fields = [
+            employee_no, hired.strftime("%m/%d/%Y"), f"CC{rng.randint(100, 249)}",
+            f"Last{i}", f"First{i}", f"Middle{i}",
+            rng.choice(POSITIONS), rng.choice(RANKS), f"Dept {rng.randint(1, 60)}",
+            last_day.strftime("%m/%d/%Y"),
+        ]
+        if rng.random() < malformed_ratio:
+            del fields[rng.randrange(1, len(fields))]
+        yield "\n\n".join(fields) + "\n\n"
+
+
+def paste_chunks(count: int, chunk_size: int = 64 * 1024, **kwargs: Any) -> Iterator[str]:
+    """paste_records() joined into chunks of about chunk_size characters."""
+    buffer: list[str] = []
+    size = 0
+    for record in paste_records(count, **kwargs):
+        buffer.append(record)
+        size += len(record)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def build_paste(count: int, **kwargs: Any) -> str:
+    return "".join(paste_records(count, **kwargs))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", help="database file to create, or text file with --paste")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--processed-ratio", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--paste", type=int, metavar="RECORDS", help="write an email-style paste instead")
+    parser.add_argument("--dup-ratio", type=float, default=0.0)
+    parser.add_argument("--malformed-ratio", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.paste is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for chunk in paste_chunks(args.paste, seed=args.seed, dup_ratio=args.dup_ratio,
+                                      malformed_ratio=args.malformed_ratio):
+                f.write(chunk)
+        print(f"Wrote {args.paste} records to {args.output}")
+        return
+
+    if os.path.exists(args.output):
+        parser.error(f"{args.output} already exists")
+
+    initialize_engine(args.output, replace(SQLiteProfile.from_env(), echo=False))
+    create_db_and_tables()
+    write_rows(get_engine(), DatasetSpec(rows=args.rows, processed_ratio=args.processed_ratio, seed=args.seed))
+    print(f"Wrote {args.rows} resignees to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+End-to-end benchmark suite for the backend.
+
+Generates a tracker database of --rows resignees, then drives the real
+FastAPI app in-process through every endpoint group: login, ingest, the
+dashboard list (pages, filters, conditional GET), each edit endpoint, the
+bulk endpoints, CSV/XLSX reports, lateness stats and search. For each scenario it reports p50/p99
+latency, sequential throughput and the Python heap peak (tracemalloc, over
+one extra untimed iteration). Results can be saved as JSON and compared
+against an earlier run, e.g. the parent commit:
+
+    python -m benchmarks.suite --rows 100000 --json after.json --compare before.json
+    python -m benchmarks.suite --rows 10000 --only list,report
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+from benchmarks._common import make_database, client, percentile, BENCH_USER, BENCH_PASSWORD
+from benchmarks.dataset import build_paste
+from src.routes import report_cache
+
+TEXT = {"Content-Type": "text/plain"}
+
+
+@dataclass
+class Context:
+    c: httpx.AsyncClient
+    rows: int
+    # Unprocessed employees the edit scenarios cycle through
+    employee_nos: list[str]
+    step: int = 0
+    etag: str = ""
+
+    def next_employee(self) -> str:
+        self.step += 1
+        return self.employee_nos[self.step % len(self.employee_nos)]
+
+
+@dataclass
+class Result:
+    scenario: str
+    n: int
+    p50_ms: float
+    p99_ms: float
+    mean_ms: float
+    ops_per_s: float
+    items_per_s: float | None
+    peak_kib: float
+
+
+Operation = Callable[[Context], Awaitable[int]]
+
+
+def check(res: httpx.Response, *expected: int) -> httpx.Response:
+    if res.status_code not in (expected or (200,)):
+        raise RuntimeError(f"{res.request.method} {res.request.url.path}: {res.status_code} {res.text[:200]}")
+    return res
+
+
+async def login(ctx: Context) -> int:
+    check(await ctx.c.post("/login", data={"username": BENCH_USER, "password": BENCH_PASSWORD}))
+    return 1
+
+
+INGEST_BATCH = 500
+
+
+async def ingest(ctx: Context) -> int:
+    ctx.step += 1
+    paste = build_paste(INGEST_BATCH, seed=ctx.step, prefix=f"S{ctx.step:03d}")
+    check(await ctx.c.post("/resignees", content=paste, headers=TEXT))
+    return INGEST_BATCH
+
+
+async def list_all(ctx: Context) -> int:
+    res = check(await ctx.c.get("/resignees"))
+    ctx.etag = res.headers.get("etag", "")
+    return len(res.json())
+
+
+async def list_first_page(ctx: Context) -> int:
+    return len(check(await ctx.c.get("/resignees", params={"limit": 100})).json())
+
+
+async def list_second_page(ctx: Context) -> int:
+    first = check(await ctx.c.get("/resignees", params={"limit": 100}))
+    cursor = first.headers.get("x-next-cursor")
+    if cursor is None:
+        return len(first.json())
+    return len(check(await ctx.c.get("/resignees", params={"limit": 100, "cursor": cursor})).json())
+
+
+async def list_filtered(ctx: Context) -> int:
+    res = check(await ctx.c.get("/resignees", params={"department": "Dept 7", "late_only": "true", "pending": "windows"}))
+    return len(res.json())
+
+
+async def list_not_modified(ctx: Context) -> int:
+    if not ctx.etag:
+        await list_all(ctx)
+    check(await ctx.c.get("/resignees", headers={"If-None-Match": ctx.etag}), 304)
+    return 1
+
+
+def put_text(path: str, body: Callable[[Context], str]) -> Operation:
+    async def operation(ctx: Context) -> int:
+        check(await ctx.c.put(f"/resignees/{ctx.next_employee()}/{path}", content=body(ctx), headers=TEXT))
+        return 1
+    return operation
+
+
+def day(ctx: Context) -> str:
+    return f"2025-{ctx.step % 12 + 1:02d}-{ctx.step % 28 + 1:02d}"
+
+
+async def process_unprocess(ctx: Context) -> int:
+    employee_no = ctx.next_employee()
+    check(await ctx.c.put(f"/resignees/{employee_no}/process"))
+    check(await ctx.c.put(f"/resignees/{employee_no}/unprocess"))
+    return 2
+
+
+BULK_SIZE = 100
+
+
+async def bulk_deactivation_dates(ctx: Context) -> int:
+    updates = [
+        {"employee_no": ctx.next_employee(), "account": account, "date": day(ctx)}
+        for _ in range(BULK_SIZE // 4)
+        for account in ("um", "third_party", "email", "windows")
+    ]
+    check(await ctx.c.put("/resignees/deactivation-dates", json=updates))
+    return len(updates)
+
+
+async def bulk_process_unprocess(ctx: Context) -> int:
+    employee_nos = [ctx.next_employee() for _ in range(BULK_SIZE)]
+    check(await ctx.c.put("/resignees/process", json={"employee_nos": employee_nos}))
+    check(await ctx.c.put("/resignees/unprocess", json={"employee_nos": employee_nos}))
+    return 2 * len(employee_nos)
+
+
+def report(fmt: str, start: str, end: str, cached: bool = False) -> Operation:
+    async def operation(ctx: Context) -> int:
+        # Measure generation, not the report cache, unless asked to
+        if not cached:
+            report_cache.clear()
+        res = check(await ctx.c.get("/resignees/report", params={"start_date": start, "end_date": end, "format": fmt}))
+        # CSV rows, minus the header (XLSX scenarios do not count items)
+        return res.text.count("\n") - 1 if fmt == "csv" else 1
+    return operation
+
+
+def stats(start: str, end: str) -> Operation:
+    async def operation(ctx: Context) -> int:
+        check(await ctx.c.get("/resignees/stats", params={"start_date": start, "end_date": end}))
+        return 1
+    return operation
+
+
+def search(q: Callable[[Context], str]) -> Operation:
+    async def operation(ctx: Context) -> int:
+        return len(check(await ctx.c.get("/resignees/search", params={"q": q(ctx)})).json())
+    return operation
+
+
+# name -> (operation, iterations relative to --iterations, counts items?)
+SCENARIOS: dict[str, tuple[Operation, float, bool]] = {
+    "login": (login, 1, False),
+    "list_all": (list_all, 1, True),
+    "list_first_page": (list_first_page, 1, True),
+    "list_second_page": (list_second_page, 1, True),
+    "list_filtered": (list_filtered, 1, True),
+    "list_not_modified": (list_not_modified, 1, False),
+    "edit_last_day": (put_text("last_day", day), 1, False),
+    "edit_um": (put_text("um", day), 1, False),
+    "edit_third_party": (put_text("third-party", day), 1, False),
+    "edit_email": (put_text("email", day), 1, False),
+    "edit_windows": (put_text("windows", day), 1, False),
+    "edit_date_hr_emailed": (put_text("date_hr_emailed", day), 1, False),
+    "edit_remarks": (put_text("remarks", lambda ctx: f"benchmark note {ctx.step}"), 1, False),
+    "process_unprocess": (process_unprocess, 1, True),
+    "bulk_deactivation_dates_100": (bulk_deactivation_dates, 0.2, True),
+    "bulk_process_unprocess_100": (bulk_process_unprocess, 0.2, True),
+    "report_csv_1y": (report("csv", "2024-01-01", "2024-12-31"), 0.1, True),
+    "report_csv_all": (report("csv", "2000-01-01", "2100-01-01"), 0.05, True),
+    "report_xlsx_1y": (report("xlsx", "2024-01-01", "2024-12-31"), 0.05, False),
+    "report_csv_1y_cached": (report("csv", "2024-01-01", "2024-12-31", cached=True), 0.5, True),
+    "report_xlsx_1y_cached": (report("xlsx", "2024-01-01", "2024-12-31", cached=True), 0.5, False),
+    "stats_4y": (stats("2021-01-01", "2024-12-31"), 0.5, False),
+    # Partial first and last months are counted from resignee rows
+    "stats_4y_partial_months": (stats("2021-01-15", "2024-12-10"), 0.5, False),
+    # Synthetic last names are "Last" plus the employee number
+    "search_name": (search(lambda ctx: f"Last{int(ctx.next_employee())}"), 1, True),
+    "search_name_prefix": (search(lambda ctx: "la"), 1, True),
+    "search_position_department": (search(lambda ctx: f"Teller Dept {int(ctx.next_employee()) % 60 + 1}"), 1, True),
+    # Last: it grows the unprocessed list the scenarios above read
+    "ingest_500": (ingest, 0.2, True),
+}
+
+
+async def run_scenario(name: str, ctx: Context, iterations: int) -> Result:
+    operation, weight, counts_items = SCENARIOS[name]
+    n = max(3, int(iterations * weight))
+    samples: list[float] = []
+    items = 0
+    started = time.perf_counter()
+    for _ in range(n):
+        start = time.perf_counter()
+        items += await operation(ctx)
+        samples.append(time.perf_counter() - start)
+    wall = time.perf_counter() - started
+
+    # One more, untimed, for the allocation peak; tracemalloc slows everything down
+    tracemalloc.start()
+    try:
+        await operation(ctx)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        scenario=name,
+        n=n,
+        p50_ms=percentile(samples, 50) * 1000,
+        p99_ms=percentile(samples, 99) * 1000,
+        mean_ms=sum(samples) / n * 1000,
+        ops_per_s=n / wall,
+        items_per_s=items / wall if counts_items else None,
+        peak_kib=peak / 1024,
+    )
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def max_rss_kib() -> int | None:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1)
+
+
+def print_results(results: list[Result], baseline: dict[str, Any] | None) -> None:
+    previous = {r["scenario"]: r for r in baseline["results"]} if baseline else {}
+    header = f"{'scenario':<30} {'n':>5} {'p50 ms':>9} {'p99 ms':>9} {'ops/s':>9} {'items/s':>10} {'peak KiB':>9}"
+    if previous:
+        header += f" {'p50 vs base':>12} {'p99 vs base':>12}"
+    print(header)
+    for r in results:
+        items = f"{r.items_per_s:10.0f}" if r.items_per_s is not None else f"{'-':>10}"
+        line = f"{r.scenario:<30} {r.n:>5} {r.p50_ms:9.2f} {r.p99_ms:9.2f} {r.ops_per_s:9.1f} {items} {r.peak_kib:9.0f}"
+        base = previous.get(r.scenario)
+        if base:
+            line += f" {r.p50_ms / base['p50_ms']:11.2f}x {r.p99_ms / base['p99_ms']:11.2f}x"
+        print(line)
+
+
+async def run(args: argparse.Namespace) -> None:
+    selected = [name for name in SCENARIOS if not args.only or any(name.startswith(p) for p in args.only.split(","))]
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    start = time.perf_counter()
+    make_database(args.rows, unprocessed_ratio=args.unprocessed_ratio, seed=args.seed)
+    setup_s = time.perf_counter() - start
+
+    async with client() as c:
+        employee_nos = [r["employee_no"] for r in check(await c.get("/resignees", params={"limit": 500})).json()]
+        ctx = Context(c=c, rows=args.rows, employee_nos=employee_nos)
+        results = [await run_scenario(name, ctx, args.iterations) for name in selected]
+
+    meta = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "rows": args.rows,
+        "unprocessed_ratio": args.unprocessed_ratio,
+        "iterations": args.iterations,
+        "setup_s": round(setup_s, 2),
+        "max_rss_kib": max_rss_kib(),
+    }
+    print(" ".join(f"{k}={v}" for k, v in meta.items()))
+    if baseline:
+        print(f"baseline: commit={baseline['meta']['commit']} rows={baseline['meta']['rows']}")
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": [asdict(r) for r in results]}, f, indent=2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--unprocessed-ratio", type=float, default=0.05)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="comma-separated scenario name prefixes")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="results JSON from an earlier run to compare against")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,53 @@
-from src.app import app
-import uvicorn
 import sys
+import socket
 import threading
+import time
 import webview
 import ctypes
+import multiprocessing
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8000
+SERVER_URL = f"http://localhost:{SERVER_PORT}"
+SERVER_START_TIMEOUT = 60
+
+# Shown until the backend accepts connections; inline so it needs no server
+SPLASH_HTML = """<!doctype html>
+<html>
+<body style="margin:0;height:100vh;display:flex;align-items:center;justify-content:center;
+             font-family:'Segoe UI',sans-serif;background:#f8fafc;color:#334155">
+  <div>Starting AUB Resignee Tracker&hellip;</div>
+</body>
+</html>"""
+
+STARTUP_ERROR_HTML = """<!doctype html>
+<html>
+<body style="font-family:'Segoe UI',sans-serif;padding:2rem;color:#991b1b">
+  The backend did not start. Close this window and try again.
+</body>
+</html>"""
 
 def set_window_title(title):
     if sys.platform == 'win32':
         ctypes.windll.kernel32.SetConsoleTitleW(title)
 
 def run_fastapi():
-    uvicorn.run("src.app:app", host="127.0.0.1", port=8000)
+    # Imported here, off the main thread, so the window appears while
+    # FastAPI, SQLAlchemy and the app modules are still loading
+    import uvicorn
+    uvicorn.run("src.app:app", host=SERVER_HOST, port=SERVER_PORT)
+
+def wait_for_server(window):
+    """Swap the splash screen for the dashboard once the backend is listening."""
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((SERVER_HOST, SERVER_PORT), timeout=0.5):
+                window.load_url(SERVER_URL)
+                return
+        except OSError:
+            time.sleep(0.05)
+    window.load_html(STARTUP_ERROR_HTML)
 
 # ✅ PyWebView API to get full file path
 class API:
@@ -24,6 +61,8 @@ class API:
         return result[0] if result else None
 
 if __name__ == "__main__":
+    # Needed by the PII decryption and report job process pools in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     set_window_title("AUB Resignee Tracker")
 
     fastapi_thread = threading.Thread(target=run_fastapi, daemon=True)
@@ -33,7 +72,7 @@ if __name__ == "__main__":
 
     window = webview.create_window(
         "AUB Resignee Tracker",
-        "http://localhost:8000",
+        html=SPLASH_HTML,
         width=1200,
         height=800,
         min_size=(800, 600),
@@ -41,4 +80,4 @@ if __name__ == "__main__":
         js_api=api
     )
 
-    webview.start(gui='edgechromium', debug=False, http_server=True)
+    webview.start(wait_for_server, window, gui='edgechromium', debug=False, http_server=True)
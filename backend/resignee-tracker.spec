@@ -27,12 +27,25 @@ a = Analysis(
         'click',
         'h11',
         'typing_extensions',
+        'aiosqlite',
+        'sqlalchemy.dialects.sqlite.aiosqlite',
         'src.routes',
         'src.app',
         'src.supabase_client',
         'src.services',
         'src.schemas',
         'src.auth',
+        'src.migrations',
+        'src.database',
+        'src.events',
+        'src.static_assets',
+        'src.metrics',
+        'src.query_stats',
+        # Imported by name in spawned report job workers
+        'src.report_jobs',
+        # Imported lazily (first export / first use of PII encryption)
+        'xlsxwriter',
+        'cryptography.fernet',
         # Add any other imports your routes use
     ],
     hookspath=['.'],  # Add path to your hooks if any
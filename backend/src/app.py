@@ -3,12 +3,21 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.requests import Request
 from fastapi.responses import Response
 from fastapi.responses import JSONResponse
-from src.services import verify_token
+from fastapi.concurrency import run_in_threadpool
+from src.services import verify_token, load_jwt_secret, TokenCache
 from src.routes import router
 from src.auth import auth_router
 from typing import Callable, Awaitable
 from src.database import initialize_engine, create_db_and_tables
-# from contextlib import asynccontextmanager
+from src import database
+from src.events import change_broker, RESYNC
+from src.crypto_utils import shutdown_decrypt_pool
+from src.static_assets import StaticAsset, build_manifest
+from src.metrics import metrics, MetricsMiddleware
+from src.query_stats import QueryStatsMiddleware
+from src.report_jobs import report_jobs
+from src.routes import parse_if_none_match
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
@@ -16,18 +25,29 @@ from pathlib import Path
 import uvicorn
 import sys
 import os
+import logging
 from pathlib import Path
 
-# @asynccontextmanager
-# async def lifespan(app: FastAPI):
-#     initialize_engine()
-#     create_db_and_tables()
-#     yield
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Read the JWT secret once instead of on every request
+    try:
+        load_jwt_secret()
+    except ValueError as e:
+        # verify_token retries (and fails the request) until the secret is set
+        logger.warning(str(e))
+    get_static_manifest()
+    yield
+    shutdown_decrypt_pool()
+    report_jobs.shutdown()
+    await database.registry.dispose_all()
 
 
 app = FastAPI(
     swagger_ui_parameters={"syntaxHighlight": {"theme": "obsidian"}},
-    # lifespan=lifespan
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -36,6 +56,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 app.include_router(auth_router)
@@ -47,12 +68,20 @@ class DBPath(BaseModel):
 @app.post("/db-path")
 async def set_db_path(body: DBPath):
     try:
-        initialize_engine(body.path)
-        create_db_and_tables()
+        entry = initialize_engine(body.path)
+        # Schema checks are cached per file, so switching back is cheap; the
+        # first open of a file may run migrations, kept off the event loop.
+        # The entry is passed on explicitly: an overlapping switch may have
+        # replaced the current one already
+        await run_in_threadpool(create_db_and_tables, entry)
+        # Everything subscribers have on screen came from the previous file
+        change_broker.publish(RESYNC, database.data_version)
         return {"message": f"Database initialized successfully at {body.path}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+token_cache = TokenCache()
+
 @app.middleware("http")
 async def auth_middleware(request: Request, call_next: Callable[[Request], Awaitable[Response]]):
     if request.method == "OPTIONS":
@@ -61,15 +90,24 @@ async def auth_middleware(request: Request, call_next: Callable[[Request], Await
     
     if request.url.path.startswith("/resignees"):
         token = request.cookies.get("access_token")
-        if not token or not await verify_token(token):
-            print('ohno')
+        if not token:
+            logger.debug("Unauthorized %s: no access token", request.url.path)
             return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
+
+        # Repeat requests with a still-valid token skip decoding entirely
+        if token_cache.get(token) is None:
+            payload = await verify_token(token)
+            if not payload:
+                logger.debug("Unauthorized %s: invalid token", request.url.path)
+                return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
+            token_cache.put(token, payload)
     return await call_next(request)
 
 def get_base_path():
     if getattr(sys, 'frozen', False):
         return sys._MEIPASS
-    return os.path.dirname(os.path.abspath(__file__))
+    # static/ sits next to src/ in the backend folder, same as the bundled layout
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 # Then modify your static files mounting:
 base_path = Path(get_base_path())
@@ -77,6 +115,14 @@ static_path = base_path / 'static'
 
 app.mount("/static", StaticFiles(directory=static_path), name="static")
 
+app.add_middleware(QueryStatsMiddleware)
+# Added last so it is outermost: auth and CORS handling are part of the measured time
+app.add_middleware(MetricsMiddleware, registry=metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # List of your frontend HTML files
 FRONTEND_PAGES = {
     "": "index.html",
@@ -84,26 +130,35 @@ FRONTEND_PAGES = {
     "signup": "signup.html",
 }
 
+_static_manifest: dict[str, StaticAsset] | None = None
+
+def get_static_manifest() -> dict[str, StaticAsset]:
+    global _static_manifest
+    if _static_manifest is None:
+        _static_manifest = build_manifest(static_path)
+    return _static_manifest
+
+def static_response(request: Request, asset: StaticAsset) -> Response:
+    encoding, variant = asset.select(request.headers.get("accept-encoding"))
+    headers = {"ETag": variant.etag, "Cache-Control": asset.cache_control}
+    if len(asset.variants) > 1:
+        headers["Vary"] = "Accept-Encoding"
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    if variant.etag in parse_if_none_match(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(variant.path, media_type=asset.media_type, headers=headers, stat_result=variant.stat)
+
 @app.get("/{full_path:path}")
-async def serve_spa(full_path: str):
-    print(full_path)
-    # Check if the path matches one of our frontend pages
-    if full_path in FRONTEND_PAGES:
-        file_path = static_path / FRONTEND_PAGES[full_path]
-        if file_path.exists():
-            return FileResponse(file_path)
-    
-    # Check if the request is for a static file (like JS or CSS)
-    static_file = static_path / full_path
-    if static_file.exists() and static_file.is_file():
-        return FileResponse(static_file)
-    
-    # Default to index.html for all other paths (SPA behavior)
-    index_file = static_path / "index.html"
-    if index_file.exists():
-        return FileResponse(index_file)
-    
-    return {"message": "Frontend not built"}
+async def serve_spa(full_path: str, request: Request):
+    manifest = get_static_manifest()
+    asset = manifest.get(FRONTEND_PAGES.get(full_path, full_path))
+    if asset is None:
+        # Default to index.html for all other paths (SPA behavior)
+        asset = manifest.get("index.html")
+    if asset is None:
+        return {"message": "Frontend not built"}
+    return static_response(request, asset)
 
 # if __name__ == "__main__":
 #     uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=False)
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException, Form, Depends
 from datetime import datetime
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi.responses import Response
-from src.database import get_engine
+from src.database import get_async_session
 from datetime import timedelta
 import jwt
 import os
@@ -14,9 +15,8 @@ auth_router = APIRouter(
     tags=["auth"]
 )
 
-def get_session():
-    engine = get_engine()
-    with Session(engine) as session:
+async def get_session():
+    async for session in get_async_session():
         yield session
 
 @auth_router.post("/login")
@@ -24,14 +24,14 @@ async def login(
     response: Response, 
     username: str = Form(...), 
     password: str = Form(...),
-    session: Session = Depends(get_session)):
+    session: AsyncSession = Depends(get_session)):
     """
     Login endpoint for Account table.
     """
     try:
         # Query the database using SQLModel
         statement = select(Account).where(Account.username == username)
-        result = session.exec(statement)
+        result = await session.exec(statement)
         account= result.first()
 
         if not account:
@@ -92,7 +92,7 @@ async def logout(response: Response):
 async def create_account(
     username: str = Form(...),
     password: str = Form(...),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """
     Create a new account.
@@ -100,16 +100,16 @@ async def create_account(
     """
     try:
         # Check for duplicate username
-        existing = session.exec(
+        existing = (await session.exec(
             select(Account).where(Account.username == username)
-        ).first()
+        )).first()
         if existing:
             raise HTTPException(status_code=400, detail="Username already exists")
 
         # Save account with raw password (not recommended for production)
         new_account = Account(username=username, password=password)
         session.add(new_account)
-        session.commit()
+        await session.commit()
 
         return {"message": "Account created successfully"}
 
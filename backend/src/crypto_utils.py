@@ -1,14 +1,100 @@
 import os
-from cryptography.fernet import Fernet
+import hmac
+import hashlib
+import asyncio
+import multiprocessing
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Sequence, TYPE_CHECKING
 
-FERNET_KEY = os.environ.get("FERNET_KEY")
-if not FERNET_KEY:
-    raise Exception("FERNET_KEY environment variable not set!")
+if TYPE_CHECKING:
+    from cryptography.fernet import Fernet
 
-fernet = Fernet(FERNET_KEY.encode())
+# Resignee columns stored as Fernet tokens when ENCRYPT_PII is on. Dates,
+# lateness flags and organisational fields (department, cost center, ...)
+# stay in plaintext so filters, reports ranges and stats keep working in SQL.
+ENCRYPTED_FIELDS = ("employee_no", "last_name", "first_name", "middle_name", "remarks")
+
+# Below this many tokens the process pool's IPC costs more than it saves
+PARALLEL_DECRYPT_THRESHOLD = 2000
+DECRYPT_CHUNK_SIZE = 1000
+
+_decrypt_pool: ProcessPoolExecutor | None = None
+
+def encryption_enabled() -> bool:
+    return os.environ.get("ENCRYPT_PII", "").lower() in ("1", "true", "yes")
+
+@lru_cache(maxsize=1)
+def _load_key() -> bytes:
+    FERNET_KEY = os.environ.get("FERNET_KEY")
+    if not FERNET_KEY:
+        raise Exception("FERNET_KEY environment variable not set!")
+    return FERNET_KEY.encode()
+
+@lru_cache(maxsize=1)
+def get_fernet() -> "Fernet":
+    # Only loaded once encryption is actually used
+    from cryptography.fernet import Fernet
+    return Fernet(_load_key())
+
+@lru_cache(maxsize=1)
+def _blind_index_key() -> bytes:
+    # Separate key derived from the Fernet key, so the index never reuses it directly
+    return hashlib.sha256(b"resignee-blind-index:" + _load_key()).digest()
 
 def encrypt_field(value: str) -> str:
-    return fernet.encrypt(value.encode()).decode()
+    return get_fernet().encrypt(value.encode()).decode()
 
 def decrypt_field(token: str) -> str:
-    return fernet.decrypt(token.encode()).decode()
\ No newline at end of file
+    return get_fernet().decrypt(token.encode()).decode()
+
+def blind_index(value: str) -> str:
+    """
+    Deterministic keyed hash used to look up and de-duplicate encrypted
+    employee numbers. Keyed (HMAC) rather than a bare SHA-256 because employee
+    numbers are short enough to brute-force.
+    """
+    return hmac.new(_blind_index_key(), value.encode(), hashlib.sha256).hexdigest()
+
+def encrypt_row(row: dict[str, Any]) -> dict[str, Any]:
+    """Resignee column values as stored in encrypted mode: PII encrypted, blind index set."""
+    encrypted = dict(row)
+    encrypted["employee_no_hash"] = blind_index(row["employee_no"])
+    for field in ENCRYPTED_FIELDS:
+        if row.get(field) is not None:
+            encrypted[field] = encrypt_field(row[field])
+    return encrypted
+
+def decrypt_many(tokens: Sequence[str | None]) -> list[str | None]:
+    fernet = get_fernet()
+    return [fernet.decrypt(token.encode()).decode() if token is not None else None for token in tokens]
+
+def _get_decrypt_pool() -> ProcessPoolExecutor:
+    global _decrypt_pool
+    if _decrypt_pool is None:
+        # spawn, like the report job pool: forking a process that runs an
+        # event loop and aiosqlite threads is not safe
+        _decrypt_pool = ProcessPoolExecutor(
+            max_workers=min(4, os.cpu_count() or 1), mp_context=multiprocessing.get_context("spawn")
+        )
+    return _decrypt_pool
+
+async def decrypt_in_pool(tokens: Sequence[str | None]) -> list[str | None]:
+    """
+    Decrypt a batch of tokens off the event loop: in a worker thread for
+    small batches, spread over the process pool for large list/report reads.
+    """
+    if len(tokens) < PARALLEL_DECRYPT_THRESHOLD:
+        return await asyncio.to_thread(decrypt_many, tokens)
+
+    loop = asyncio.get_running_loop()
+    pool = _get_decrypt_pool()
+    chunks = [tokens[i:i + DECRYPT_CHUNK_SIZE] for i in range(0, len(tokens), DECRYPT_CHUNK_SIZE)]
+    results = await asyncio.gather(*(loop.run_in_executor(pool, decrypt_many, chunk) for chunk in chunks))
+    return [value for chunk in results for value in chunk]
+
+def shutdown_decrypt_pool() -> None:
+    global _decrypt_pool
+    if _decrypt_pool is not None:
+        _decrypt_pool.shutdown(cancel_futures=True)
+        _decrypt_pool = None
@@ -1,36 +1,294 @@
 from sqlmodel import create_engine, SQLModel
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
 import src.models
-from typing import Optional
+from src.migrations import run_migrations, encrypt_plaintext_rows
+from src.crypto_utils import encryption_enabled
+from src.query_stats import instrument_engine, untracked_queries
+from typing import AsyncIterator, Any
+from dataclasses import dataclass
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 
 # Default values
 # database.py
 
-from sqlmodel import create_engine, SQLModel
-from typing import Optional
+import asyncio
 import threading
+import os
+import uuid
+
+@dataclass(frozen=True)
+class SQLiteProfile:
+    """
+    Per-connection SQLite settings, applied as PRAGMAs when the pool opens a
+    connection. WAL lets the dashboard keep reading while a write commits, and
+    synchronous=NORMAL is durable across application crashes (only an OS
+    crash or power loss can drop the last commits) at a fraction of the fsyncs.
+    """
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size_kib: int = 64 * 1024
+    busy_timeout_ms: int = 5000
+    temp_store: str = "MEMORY"
+    # SQLite allows one writer at a time, so a big pool only adds lock waits
+    pool_size: int = 8
+    max_overflow: int = 4
+    echo: bool = False
+
+    @classmethod
+    def from_env(cls) -> "SQLiteProfile":
+        """Defaults, overridable through SQLITE_* environment variables; SQL_ECHO=1 logs statements."""
+        env = os.environ
+        defaults = cls()
+        return cls(
+            journal_mode=env.get("SQLITE_JOURNAL_MODE", defaults.journal_mode),
+            synchronous=env.get("SQLITE_SYNCHRONOUS", defaults.synchronous),
+            mmap_size=int(env.get("SQLITE_MMAP_SIZE", defaults.mmap_size)),
+            cache_size_kib=int(env.get("SQLITE_CACHE_SIZE_KIB", defaults.cache_size_kib)),
+            busy_timeout_ms=int(env.get("SQLITE_BUSY_TIMEOUT_MS", defaults.busy_timeout_ms)),
+            temp_store=env.get("SQLITE_TEMP_STORE", defaults.temp_store),
+            pool_size=int(env.get("SQLITE_POOL_SIZE", defaults.pool_size)),
+            max_overflow=int(env.get("SQLITE_MAX_OVERFLOW", defaults.max_overflow)),
+            echo=env.get("SQL_ECHO", "").lower() in ("1", "true", "yes"),
+        )
+
+    def pragmas(self) -> list[str]:
+        return [
+            f"PRAGMA journal_mode={self.journal_mode}",
+            f"PRAGMA synchronous={self.synchronous}",
+            f"PRAGMA mmap_size={self.mmap_size}",
+            # Negative cache_size is in KiB rather than pages
+            f"PRAGMA cache_size=-{self.cache_size_kib}",
+            f"PRAGMA busy_timeout={self.busy_timeout_ms}",
+            f"PRAGMA temp_store={self.temp_store}",
+        ]
+
+# Settings the app used before profiles existed (SQLite defaults), for benchmarks
+LEGACY_PROFILE = SQLiteProfile(
+    journal_mode="DELETE", synchronous="FULL", mmap_size=0, cache_size_kib=2000,
+    busy_timeout_ms=5000, temp_store="DEFAULT", pool_size=5, max_overflow=10,
+)
+
+def apply_profile(target: Engine, profile: SQLiteProfile) -> None:
+    @event.listens_for(target, "connect")
+    def set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in profile.pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+class EngineEntry:
+    """The sync and async engines for one database file."""
+
+    def __init__(self, path: str, profile: SQLiteProfile):
+        self.path = path
+        # Schema setup and migrations only; one connection is enough
+        self.engine = create_engine(f"sqlite:///{path}", echo=profile.echo, pool_size=1, max_overflow=1)
+        self.async_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{path}",
+            echo=profile.echo,
+            pool_size=profile.pool_size,
+            max_overflow=profile.max_overflow,
+        )
+        apply_profile(self.engine, profile)
+        apply_profile(self.async_engine.sync_engine, profile)
+        instrument_engine(self.engine)
+        instrument_engine(self.async_engine.sync_engine)
+        # Sessions currently using these engines; an evicted entry is only
+        # disposed once the last of them is released
+        self.leases = 0
+        self.evicted = False
+
+    async def dispose(self) -> None:
+        self.engine.dispose()
+        await self.async_engine.dispose()
+
+class EngineRegistry:
+    """
+    Open database files, most recently used last, one of them current.
+    Switching files reuses a still-open entry's warm pool; beyond
+    `max_open` the least recently used entry is evicted and its pools
+    disposed, deferred while sessions that started on it are still running.
+    """
+
+    def __init__(self, max_open: int = 4):
+        self.max_open = max_open
+        self._entries: OrderedDict[str, EngineEntry] = OrderedDict()
+        self._current: EngineEntry | None = None
+        self._lock = threading.Lock()
+        # Strong references to pending dispose() tasks
+        self._disposing: set[asyncio.Task] = set()
+
+    def activate(self, db_path: str, profile: SQLiteProfile | None = None) -> EngineEntry:
+        key = os.path.abspath(db_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = EngineEntry(db_path, profile or SQLiteProfile.from_env())
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            entry.evicted = False
+            self._current = entry
+
+            evicted = []
+            while len(self._entries) > self.max_open:
+                _, old = self._entries.popitem(last=False)
+                old.evicted = True
+                if old.leases == 0:
+                    evicted.append(old)
+        for old in evicted:
+            self._schedule_dispose(old)
+        return entry
+
+    def current(self) -> EngineEntry:
+        if self._current is None:
+            raise RuntimeError("Database engine not initialized. Call initialize_engine first.")
+        return self._current
+
+    def lease(self, entry: EngineEntry | None = None) -> EngineEntry:
+        with self._lock:
+            entry = entry or self.current()
+            entry.leases += 1
+            return entry
 
-engine = None
-sqlite_file_name = None
-sqlite_url = None
-_engine_lock = threading.Lock()  # for thread-safe engine setup
+    async def release(self, entry: EngineEntry) -> None:
+        with self._lock:
+            entry.leases -= 1
+            dispose = entry.evicted and entry.leases == 0
+        if dispose:
+            await entry.dispose()
+
+    def _schedule_dispose(self, entry: EngineEntry) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (startup, scripts): the async pool's connections
+            # belong to a loop that is gone, so only the sync pool can be closed
+            entry.engine.dispose()
+            return
+        task = loop.create_task(entry.dispose())
+        self._disposing.add(task)
+        task.add_done_callback(self._disposing.discard)
+
+    async def dispose_all(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._current = None
+        for entry in entries:
+            await entry.dispose()
+
+registry = EngineRegistry(max_open=int(os.environ.get("SQLITE_MAX_OPEN_DATABASES", 4)))
+_engine_lock = threading.Lock()  # guards data_version
+
+# Files whose schema was already created/migrated by this process, keyed by
+# path with (device, inode) so a file replaced on disk is checked again
+_schema_checked: dict[str, tuple[int, int]] = {}
+
+# Bumped after every committed write in this process; combined with a
+# per-process epoch and the database file's mtime (writes from other
+# processes) into a cheap fingerprint of the current data
+data_version = 0
+_data_epoch = uuid.uuid4().hex[:8]
 
 def get_engine():
-    global engine
-    if engine is None:
-        raise RuntimeError("Database engine not initialized. Call initialize_engine first.")
-    return engine
+    return registry.current().engine
+
+def get_async_engine() -> AsyncEngine:
+    return registry.current().async_engine
 
-def initialize_engine(db_path: str = "database.db"):
-    global engine, sqlite_file_name, sqlite_url
+def initialize_engine(db_path: str = "database.db", profile: SQLiteProfile | None = None) -> EngineEntry:
+    """
+    Make `db_path` the current database, opening its sync engine (used for
+    schema setup) and aiosqlite-backed async engine (used by the request
+    handlers) unless they are still open from an earlier switch. Sessions
+    already running keep the engine they started with. Returns the entry
+    for `db_path`: by the time the caller uses it, another switch may have
+    made a different file current.
+    """
+    entry = registry.activate(db_path, profile)
+    bump_data_version()
+    return entry
+
+def bump_data_version() -> int:
+    """Call after a write has been committed."""
+    global data_version
     with _engine_lock:
-        sqlite_file_name = db_path
-        sqlite_url = f"sqlite:///{sqlite_file_name}"
-        engine = create_engine(sqlite_url, echo=True)
-    return engine
+        data_version += 1
+        return data_version
+
+def event_id(version: int) -> str:
+    """SSE event id for a data version; the epoch keeps ids from an earlier process from matching."""
+    return f"{_data_epoch}-{version}"
 
-def create_db_and_tables():
+def get_data_fingerprint() -> str:
+    """
+    Changes whenever the data may have changed, without querying any table:
+    our own committed writes bump data_version, other processes' writes
+    touch the database (or its WAL) file.
+    """
+    try:
+        mtimes = get_file_state(registry.current().path)
+    except RuntimeError:
+        mtimes = (0, 0)
+    return f"{_data_epoch}-{data_version}-" + "-".join(str(m) for m in mtimes)
+
+def get_file_state(path: str) -> tuple[int, int]:
+    """mtimes of a database file and its WAL; every commit, from any process, changes one."""
+    mtimes = []
+    for suffix in ("", "-wal"):
+        try:
+            mtimes.append(os.stat(f"{path}{suffix}").st_mtime_ns)
+        except OSError:
+            mtimes.append(0)
+    return (mtimes[0], mtimes[1])
+
+@asynccontextmanager
+async def leased_session(entry: EngineEntry | None = None) -> AsyncIterator[AsyncSession]:
+    """
+    Session on the current database (or `entry`'s) that pins its engine
+    until closed, so a concurrent /db-path switch cannot dispose it mid-request.
+    """
+    entry = registry.lease(entry)
+    try:
+        # expire_on_commit=False so handlers can keep reading attributes after commit
+        # without triggering a lazy (sync) refresh
+        async with AsyncSession(entry.async_engine, expire_on_commit=False) as session:
+            session.info["engine_entry"] = entry
+            yield session
+    finally:
+        await registry.release(entry)
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    async with leased_session() as session:
+        yield session
+
+def create_db_and_tables(entry: EngineEntry | None = None):
+    entry = entry or registry.current()
+    try:
+        stat = os.stat(entry.path)
+        file_id = (stat.st_dev, stat.st_ino)
+    except OSError:
+        file_id = None
+    key = os.path.abspath(entry.path)
+    if file_id is not None and _schema_checked.get(key) == file_id:
+        return
     try:
-        SQLModel.metadata.create_all(get_engine())
+        # Not request work: a fresh file runs far more statements than the
+        # per-request query warning is meant to catch
+        with untracked_queries():
+            SQLModel.metadata.create_all(entry.engine)
+            run_migrations(entry.engine)
+            if encryption_enabled():
+                encrypt_plaintext_rows(entry.engine)
+        stat = os.stat(entry.path)
+        _schema_checked[key] = (stat.st_dev, stat.st_ino)
         print("Database tables created successfully")
     except Exception as e:
-        raise Exception(str(e))
\ No newline at end of file
+        raise Exception(str(e))
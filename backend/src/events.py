@@ -0,0 +1,56 @@
+# In-process change feed for resignee updates.
+# Write handlers publish small row-level events after they commit; each
+# connected /resignees/events client waits on its own bounded queue, so a
+# few hundred subscribers cost a few hundred idle coroutines and no polling.
+
+import asyncio
+import json
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from src.database import event_id
+
+# Sent instead of the dropped events when a client falls too far behind,
+# or when the whole dataset changes (e.g. another database file is opened)
+RESYNC = "resync"
+
+class ChangeBroker:
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._subscribers: set[asyncio.Queue[bytes]] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, version: int, **data: Any) -> None:
+        """
+        Fan an event out to every subscriber. Must be called from the event
+        loop thread. The SSE frame is encoded once and shared by all queues.
+        """
+        if not self._subscribers:
+            return
+        frame = format_sse(event_type, version, data)
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog and tell it to reload instead
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(format_sse(RESYNC, version, {}))
+
+    @contextmanager
+    def subscribe(self) -> Iterator[asyncio.Queue[bytes]]:
+        queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+def format_sse(event_type: str, version: int, data: dict[str, Any]) -> bytes:
+    payload = json.dumps({"type": event_type, "version": version, **data}, default=str)
+    return f"id: {event_id(version)}\nevent: {event_type}\ndata: {payload}\n\n".encode()
+
+change_broker = ChangeBroker()
@@ -0,0 +1,176 @@
+# In-process request metrics, exposed in the Prometheus text format on
+# /metrics. Recording a request is a couple of dict lookups and a bisect
+# under one lock, cheap enough to leave on in production.
+
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Paths with no matching route share one label, so scanners hitting random
+# URLs cannot blow up the number of series
+UNMATCHED_ROUTE = "<unmatched>"
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests: dict[tuple[str, str, str], int] = defaultdict(int)
+        self.errors: dict[tuple[str, str], int] = defaultdict(int)
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.response_size: dict[tuple[str, str], Histogram] = {}
+        self.report_phases: dict[tuple[str, str], Histogram] = {}
+        self._collectors: list[Callable[[], Iterable[tuple[str, str, str, float]]]] = []
+
+    def register_collector(self, collect: Callable[[], Iterable[tuple[str, str, str, float]]]) -> None:
+        """Add metrics owned elsewhere: `collect` returns (name, help, type, value) tuples at render time."""
+        self._collectors.append(collect)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, size: int) -> None:
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, str(status))] += 1
+            if status >= 500:
+                self.errors[key] += 1
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.response_size[key] = Histogram(SIZE_BUCKETS)
+            histogram.observe(seconds)
+            self.response_size[key].observe(size)
+
+    def observe_report(self, fmt: str, phases: dict[str, float]) -> None:
+        """Time one report spent per phase (query, decrypt, render)."""
+        with self._lock:
+            for phase, seconds in phases.items():
+                histogram = self.report_phases.get((fmt, phase))
+                if histogram is None:
+                    histogram = self.report_phases[(fmt, phase)] = Histogram(LATENCY_BUCKETS)
+                histogram.observe(seconds)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP resignee_tracker_start_time_seconds Unix time the process started.",
+                "# TYPE resignee_tracker_start_time_seconds gauge",
+                f"resignee_tracker_start_time_seconds {self.started}",
+                "# HELP http_requests_total HTTP requests by route and status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+            lines += [
+                "# HELP http_request_errors_total HTTP requests that ended in a 5xx or an unhandled exception.",
+                "# TYPE http_request_errors_total counter",
+            ]
+            for (method, route), count in sorted(self.errors.items()):
+                lines.append(f"http_request_errors_total{_labels(method=method, route=route)} {count}")
+            lines += _histogram_lines(
+                "http_request_duration_seconds", "Time from request start to the last response byte.",
+                [({"method": m, "route": r}, h) for (m, r), h in sorted(self.latency.items())],
+            )
+            lines += _histogram_lines(
+                "http_response_size_bytes", "Response body size.",
+                [({"method": m, "route": r}, h) for (m, r), h in sorted(self.response_size.items())],
+            )
+            lines += _histogram_lines(
+                "report_phase_seconds", "Report generation time per phase: query, decrypt, render.",
+                [({"format": f, "phase": p}, h) for (f, p), h in sorted(self.report_phases.items())],
+            )
+            for collect in self._collectors:
+                for name, help_text, kind, value in collect():
+                    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+def _histogram_lines(name: str, help_text: str, series: Iterable[tuple[dict[str, str], Histogram]]) -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in series:
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(**labels, le=repr(float(bound)))} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+    return lines
+
+class PhaseTimer:
+    """Accumulates wall time per named phase of one operation."""
+
+    def __init__(self):
+        self.phases: dict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - start
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware (no BaseHTTPMiddleware), so streamed responses
+    are timed and sized up to their last chunk and nothing is buffered.
+    """
+
+    def __init__(self, app: Any, registry: "MetricsRegistry"):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: dict[str, Any]) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            self.registry.observe_request(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                time.perf_counter() - start,
+                size,
+            )
+
+metrics = MetricsRegistry()
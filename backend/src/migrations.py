@@ -0,0 +1,318 @@
+# Versioned schema migrations for tracker databases.
+# create_all only creates missing tables, so anything added to an existing
+# table (indexes, columns) has to be applied here for .db files created by
+# older versions of the app. The applied version is kept in PRAGMA user_version.
+
+from typing import Callable
+from sqlalchemy import Engine, Connection, select, update, bindparam, literal_column, or_
+from sqlalchemy.dialects import sqlite
+from src.models import Resignee
+from src.services import LATE_FLAG_COLUMNS, NO_ACCOUNT_CUTOFF, compute_late_flags, is_no_account
+from src.crypto_utils import ENCRYPTED_FIELDS, encrypt_row
+
+BACKFILL_BATCH_SIZE = 1000
+
+def _add_resignee_indexes(conn: Connection) -> None:
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_resignee_unprocessed_hr_emailed "
+        "ON resignee (date_hr_emailed) WHERE processed_date_time IS NULL"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_resignee_processed_date_time "
+        "ON resignee (processed_date_time) WHERE processed_date_time IS NOT NULL"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_resignee_last_day "
+        "ON resignee (last_day)"
+    )
+
+def _add_late_flags(conn: Connection) -> None:
+    columns = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(resignee)")}
+    for _, flag in LATE_FLAG_COLUMNS.values():
+        if flag not in columns:
+            conn.exec_driver_sql(f"ALTER TABLE resignee ADD COLUMN {flag} BOOLEAN NOT NULL DEFAULT 0")
+
+    # One-off backfill with the same rules the edit endpoints use from now on
+    table = Resignee.__table__
+    deac_columns = [deac_column for deac_column, _ in LATE_FLAG_COLUMNS.values()]
+    rows = conn.execute(
+        select(table.c.employee_no, table.c.last_day, table.c.date_hr_emailed, *(table.c[c] for c in deac_columns))
+    ).all()
+    statement = (
+        update(table)
+        .where(table.c.employee_no == bindparam("b_employee_no"))
+        .values({flag: bindparam(f"b_{flag}") for _, flag in LATE_FLAG_COLUMNS.values()})
+    )
+    for i in range(0, len(rows), BACKFILL_BATCH_SIZE):
+        params = []
+        for row in rows[i:i + BACKFILL_BATCH_SIZE]:
+            flags = compute_late_flags(row.last_day, row.date_hr_emailed, {c: row._mapping[c] for c in deac_columns})
+            params.append({"b_employee_no": row.employee_no, **{f"b_{flag}": late for flag, late in flags.items()}})
+        conn.execute(statement, params)
+
+def _add_keyset_index(conn: Connection) -> None:
+    # Extend the unprocessed list index with employee_no, the keyset tiebreaker
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_resignee_unprocessed_hr_emailed")
+    conn.exec_driver_sql(
+        "CREATE INDEX ix_resignee_unprocessed_hr_emailed "
+        "ON resignee (date_hr_emailed, employee_no) WHERE processed_date_time IS NULL"
+    )
+
+def _add_employee_no_hash(conn: Connection) -> None:
+    columns = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(resignee)")}
+    if "employee_no_hash" not in columns:
+        conn.exec_driver_sql("ALTER TABLE resignee ADD COLUMN employee_no_hash VARCHAR")
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_resignee_employee_no_hash "
+        "ON resignee (employee_no_hash) WHERE employee_no_hash IS NOT NULL"
+    )
+
+STATS_TRIGGER_COLUMNS = ("last_day", "department") + tuple(
+    column for deac_column, flag in LATE_FLAG_COLUMNS.values() for column in (deac_column, flag)
+)
+
+def _no_account_sql(deac: str) -> str:
+    """is_no_account() as SQL text for trigger bodies; NULL when the date is."""
+    return str(is_no_account(literal_column(deac)).compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+
+def _stats_terms(row: str) -> list[tuple[str, str]]:
+    """resignee_monthly_stats column -> one row's contribution, for row alias NEW, OLD or resignee."""
+    terms = [("resignees", "1")]
+    for deac_column, flag in LATE_FLAG_COLUMNS.values():
+        prefix = flag.removesuffix("_late")
+        deac = f"{row}.{deac_column}"
+        terms += [
+            (f"{prefix}_deactivated", f"coalesce(NOT ({_no_account_sql(deac)}), 0)"),
+            (f"{prefix}_late", f"coalesce({row}.{flag}, 0)"),
+            (f"{prefix}_pending", f"{deac} IS NULL"),
+            (f"{prefix}_no_account", f"coalesce({_no_account_sql(deac)}, 0)"),
+        ]
+    return terms
+
+def _days_select(row: str, deac_column: str, flag: str) -> str:
+    """(month, account, days) of one account's deactivation, for rows that have one."""
+    return (
+        f"substr({row}.last_day, 1, 7), '{flag.removesuffix('_late')}', "
+        f"CAST(julianday({row}.{deac_column}) - julianday({row}.last_day) AS INTEGER)"
+    )
+
+def _apply_stats(row: str, sign: str) -> str:
+    """Trigger statements adding (sign '+') or removing (sign '-') one row's counts."""
+    terms = _stats_terms(row)
+    statements = [
+        f"INSERT INTO resignee_monthly_stats (month, department, {', '.join(c for c, _ in terms)}) "
+        f"VALUES (substr({row}.last_day, 1, 7), {row}.department, {', '.join(f'{sign}({e})' for _, e in terms)}) "
+        f"ON CONFLICT (month, department) DO UPDATE SET "
+        + ", ".join(f"{c} = {c} + excluded.{c}" for c, _ in terms) + ";"
+    ]
+    for deac_column, flag in LATE_FLAG_COLUMNS.values():
+        # The WHERE also keeps SQLite from parsing ON CONFLICT as a join constraint
+        statements.append(
+            f"INSERT INTO resignee_deactivation_days (month, account, days, resignees) "
+            f"SELECT {_days_select(row, deac_column, flag)}, {sign}1 "
+            f"WHERE NOT ({_no_account_sql(f'{row}.{deac_column}')}) "
+            f"ON CONFLICT (month, account, days) DO UPDATE SET resignees = resignees + excluded.resignees;"
+        )
+    return "\n".join(statements)
+
+def _add_monthly_stats(conn: Connection) -> None:
+    # The tables themselves come from create_all; triggers are not expressible there
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS resignee_stats_insert")
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS resignee_stats_delete")
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS resignee_stats_update")
+    conn.exec_driver_sql(f"CREATE TRIGGER resignee_stats_insert AFTER INSERT ON resignee BEGIN\n{_apply_stats('NEW', '+')}\nEND")
+    conn.exec_driver_sql(f"CREATE TRIGGER resignee_stats_delete AFTER DELETE ON resignee BEGIN\n{_apply_stats('OLD', '-')}\nEND")
+    # Only when a counted column changes; processing and PII edits skip it
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER resignee_stats_update AFTER UPDATE OF {', '.join(STATS_TRIGGER_COLUMNS)} ON resignee BEGIN\n"
+        f"{_apply_stats('OLD', '-')}\n{_apply_stats('NEW', '+')}\nEND"
+    )
+
+    terms = _stats_terms("resignee")
+    conn.exec_driver_sql("DELETE FROM resignee_monthly_stats")
+    conn.exec_driver_sql(
+        f"INSERT INTO resignee_monthly_stats (month, department, {', '.join(c for c, _ in terms)}) "
+        f"SELECT substr(last_day, 1, 7), department, {', '.join(f'sum({e})' for _, e in terms)} "
+        f"FROM resignee GROUP BY 1, 2"
+    )
+    conn.exec_driver_sql("DELETE FROM resignee_deactivation_days")
+    for deac_column, flag in LATE_FLAG_COLUMNS.values():
+        conn.exec_driver_sql(
+            f"INSERT INTO resignee_deactivation_days (month, account, days, resignees) "
+            f"SELECT {_days_select('resignee', deac_column, flag)}, count(*) FROM resignee "
+            f"WHERE NOT ({_no_account_sql(deac_column)}) GROUP BY 1, 2, 3"
+        )
+
+SEARCH_COLUMNS = ("last_name", "first_name", "middle_name", "position_title", "department", "remarks")
+# bm25 weight per search column: a name match outranks a department or remarks match
+SEARCH_RANK = "bm25(10.0, 10.0, 5.0, 3.0, 2.0, 1.0)"
+
+def _search_values(row: str) -> str:
+    # Encrypted rows (blind index set) only index their plaintext columns, so
+    # no decrypted PII ever lands in the search index
+    return ", ".join(
+        f"CASE WHEN {row}.employee_no_hash IS NULL THEN {row}.{column} END" if column in ENCRYPTED_FIELDS else f"{row}.{column}"
+        for column in SEARCH_COLUMNS
+    )
+
+def _create_search_table(conn: Connection) -> None:
+    conn.exec_driver_sql("DROP TABLE IF EXISTS resignee_search")
+    conn.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE resignee_search USING fts5({', '.join(SEARCH_COLUMNS)}, "
+        "content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    conn.exec_driver_sql(f"INSERT INTO resignee_search (resignee_search, rank) VALUES ('rank', '{SEARCH_RANK}')")
+
+def _add_search_index(conn: Connection) -> None:
+    # Contentless: the index keeps tokens only and its rowid is resignee's, so
+    # matches are joined back to resignee. Removing a row means replaying its
+    # indexed values through the 'delete' command.
+    _create_search_table(conn)
+
+    columns = ", ".join(SEARCH_COLUMNS)
+    insert = f"INSERT INTO resignee_search (rowid, {columns}) VALUES (NEW.rowid, {_search_values('NEW')});"
+    delete = (
+        f"INSERT INTO resignee_search (resignee_search, rowid, {columns}) "
+        f"VALUES ('delete', OLD.rowid, {_search_values('OLD')});"
+    )
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS resignee_search_insert")
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS resignee_search_delete")
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS resignee_search_update")
+    conn.exec_driver_sql(f"CREATE TRIGGER resignee_search_insert AFTER INSERT ON resignee BEGIN\n{insert}\nEND")
+    conn.exec_driver_sql(f"CREATE TRIGGER resignee_search_delete AFTER DELETE ON resignee BEGIN\n{delete}\nEND")
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER resignee_search_update AFTER UPDATE OF {columns}, employee_no_hash ON resignee BEGIN\n"
+        f"{delete}\n{insert}\nEND"
+    )
+    conn.exec_driver_sql(
+        f"INSERT INTO resignee_search (rowid, {columns}) SELECT rowid, {_search_values('resignee')} FROM resignee"
+    )
+
+def _fix_no_account_cutoff(conn: Connection) -> None:
+    # Deactivations dated exactly NO_ACCOUNT_CUTOFF used to count as "No
+    # Existing Account" in stats and late checks, but as real dates in
+    # reports. They are real dates now: recompute those rows' late flags and
+    # rebuild the stats triggers and tables with is_no_account()
+    table = Resignee.__table__
+    deac_columns = [deac_column for deac_column, _ in LATE_FLAG_COLUMNS.values()]
+    rows = conn.execute(
+        select(table.c.employee_no, table.c.last_day, table.c.date_hr_emailed, *(table.c[c] for c in deac_columns))
+        .where(or_(*(table.c[c] == NO_ACCOUNT_CUTOFF for c in deac_columns)))
+    ).all()
+    if rows:
+        statement = (
+            update(table)
+            .where(table.c.employee_no == bindparam("b_employee_no"))
+            .values({flag: bindparam(f"b_{flag}") for _, flag in LATE_FLAG_COLUMNS.values()})
+        )
+        params = []
+        for row in rows:
+            flags = compute_late_flags(row.last_day, row.date_hr_emailed, {c: row._mapping[c] for c in deac_columns})
+            params.append({"b_employee_no": row.employee_no, **{f"b_{flag}": late for flag, late in flags.items()}})
+        conn.execute(statement, params)
+    _add_monthly_stats(conn)
+
+def _key_search_index_on_search_id(conn: Connection) -> None:
+    # resignee has no INTEGER PRIMARY KEY, so its implicit rowid is not
+    # stable: VACUUM or a dump and restore may renumber it and leave the
+    # index pointing at other rows. Key the index on search_id instead, an
+    # ordinary column that is copied like any other. New rows get the next
+    # id in the insert trigger, so ids still follow insertion order.
+    table_columns = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(resignee)")}
+    if "search_id" not in table_columns:
+        conn.exec_driver_sql("ALTER TABLE resignee ADD COLUMN search_id INTEGER")
+    conn.exec_driver_sql("UPDATE resignee SET search_id = rowid WHERE search_id IS NULL")
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS ix_resignee_search_id ON resignee (search_id)")
+
+    _create_search_table(conn)
+    columns = ", ".join(SEARCH_COLUMNS)
+    insert = (
+        "UPDATE resignee SET search_id = (SELECT coalesce(max(search_id), 0) + 1 FROM resignee) "
+        "WHERE rowid = NEW.rowid AND search_id IS NULL;\n"
+        f"INSERT INTO resignee_search (rowid, {columns}) "
+        f"VALUES ((SELECT search_id FROM resignee WHERE rowid = NEW.rowid), {_search_values('NEW')});"
+    )
+    delete = (
+        f"INSERT INTO resignee_search (resignee_search, rowid, {columns}) "
+        f"VALUES ('delete', OLD.search_id, {_search_values('OLD')});"
+    )
+    reinsert = f"INSERT INTO resignee_search (rowid, {columns}) VALUES (NEW.search_id, {_search_values('NEW')});"
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS resignee_search_insert")
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS resignee_search_delete")
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS resignee_search_update")
+    conn.exec_driver_sql(f"CREATE TRIGGER resignee_search_insert AFTER INSERT ON resignee BEGIN\n{insert}\nEND")
+    conn.exec_driver_sql(f"CREATE TRIGGER resignee_search_delete AFTER DELETE ON resignee BEGIN\n{delete}\nEND")
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER resignee_search_update AFTER UPDATE OF {columns}, employee_no_hash ON resignee BEGIN\n"
+        f"{delete}\n{reinsert}\nEND"
+    )
+    conn.exec_driver_sql(
+        f"INSERT INTO resignee_search (rowid, {columns}) SELECT search_id, {_search_values('resignee')} FROM resignee"
+    )
+
+# (version, step) pairs, applied in order. Never edit a released step; add a new one.
+MIGRATIONS: list[tuple[int, Callable[[Connection], None]]] = [
+    (1, _add_resignee_indexes),
+    (2, _add_late_flags),
+    (3, _add_keyset_index),
+    (4, _add_employee_no_hash),
+    (5, _add_monthly_stats),
+    (6, _add_search_index),
+    (7, _fix_no_account_cutoff),
+    (8, _key_search_index_on_search_id),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+def run_migrations(engine: Engine) -> int:
+    """
+    Apply every migration newer than the database's user_version.
+    Each step runs in its own transaction together with its version bump.
+    Returns the resulting schema version.
+    """
+    with engine.connect() as conn:
+        version = get_schema_version(conn)
+
+    for step_version, step in MIGRATIONS:
+        if step_version <= version:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {step_version}")
+        version = step_version
+        print(f"Applied database migration {step_version}")
+
+    return version
+
+def encrypt_plaintext_rows(engine: Engine) -> int:
+    """
+    Encrypt rows written before ENCRYPT_PII was turned on (no blind index yet).
+    Not a versioned step: it depends on the runtime setting, and is a no-op
+    once every row is encrypted. Returns the number of rows encrypted.
+    """
+    table = Resignee.__table__
+    fields = [table.c[field] for field in ENCRYPTED_FIELDS]
+    statement = (
+        update(table)
+        .where(table.c.employee_no == bindparam("b_old_employee_no"))
+        .values({"employee_no_hash": bindparam("b_employee_no_hash"), **{field: bindparam(f"b_{field}") for field in ENCRYPTED_FIELDS}})
+    )
+    with engine.begin() as conn:
+        rows = conn.execute(select(*fields).where(table.c.employee_no_hash == None)).all()
+        for i in range(0, len(rows), BACKFILL_BATCH_SIZE):
+            params = []
+            for row in rows[i:i + BACKFILL_BATCH_SIZE]:
+                encrypted = encrypt_row(dict(row._mapping))
+                params.append({
+                    "b_old_employee_no": row.employee_no,
+                    **{f"b_{key}": value for key, value in encrypted.items()},
+                })
+            conn.execute(statement, params)
+        if rows:
+            # The update trigger already swapped their plaintext names for
+            # NULLs; merging the index segments drops the stale tokens too
+            conn.exec_driver_sql("INSERT INTO resignee_search (resignee_search) VALUES ('optimize')")
+    return len(rows)
@@ -1,7 +1,20 @@
 from datetime import datetime, date
-from sqlmodel import Field, SQLModel, Column, DateTime
+from sqlmodel import Field, SQLModel, Column, DateTime, Index, text
 
 class Resignee(SQLModel, table=True):
+    __table_args__ = (
+        # Dashboard list: unprocessed rows in (HR email date, employee no) keyset order
+        Index("ix_resignee_unprocessed_hr_emailed", "date_hr_emailed", "employee_no", sqlite_where=text("processed_date_time IS NULL")),
+        # Recently processed rows; partial so it never competes with the index above
+        Index("ix_resignee_processed_date_time", "processed_date_time", sqlite_where=text("processed_date_time IS NOT NULL")),
+        # Report date range
+        Index("ix_resignee_last_day", "last_day"),
+        # Blind index lookups when PII is encrypted
+        Index("ix_resignee_employee_no_hash", "employee_no_hash", unique=True, sqlite_where=text("employee_no_hash IS NOT NULL")),
+        # Full-text search matches are joined back on search_id
+        Index("ix_resignee_search_id", "search_id", unique=True),
+    )
+
     employee_no: str = Field(primary_key=True)
     date_hired: date = Field(..., description="Date employee was hired")
     cost_center: str = Field(..., description="Cost Center")
@@ -19,7 +32,50 @@ class Resignee(SQLModel, table=True):
     windows_date_deac: date | None = Field(..., description="Windows Deactivation Date")
     remarks: str | None = Field(..., description="Remarks")
     date_hr_emailed: datetime = Field(..., description="Date HR emailed about resignation")
+    um_late: bool = Field(default=False, sa_column_kwargs={"server_default": "0"}, description="UM deactivation was late")
+    tp_late: bool = Field(default=False, sa_column_kwargs={"server_default": "0"}, description="Third party deactivation was late")
+    email_late: bool = Field(default=False, sa_column_kwargs={"server_default": "0"}, description="Email deactivation was late")
+    windows_late: bool = Field(default=False, sa_column_kwargs={"server_default": "0"}, description="Windows deactivation was late")
+    employee_no_hash: str | None = Field(default=None, description="Blind index of employee_no when PII is encrypted")
+    search_id: int | None = Field(default=None, description="Row key in the full-text search index; assigned on insert")
 
 class Account(SQLModel, table=True):
     username: str = Field(primary_key=True)
-    password: str = Field(..., description="Password")
\ No newline at end of file
+    password: str = Field(..., description="Password")
+
+class ResigneeMonthlyStats(SQLModel, table=True):
+    """
+    Resignee counts per month of last day and department, kept current by
+    triggers on resignee (migration 5) so /resignees/stats never has to scan
+    whole years of rows. Column prefixes follow the late flag columns.
+    """
+    __tablename__ = "resignee_monthly_stats"
+
+    month: str = Field(primary_key=True, description="Month of last day, YYYY-MM")
+    department: str = Field(primary_key=True, description="Department")
+    resignees: int = Field(default=0, description="Resignees")
+    um_deactivated: int = Field(default=0, description="UM accounts deactivated")
+    um_late: int = Field(default=0, description="UM deactivations that were late")
+    um_pending: int = Field(default=0, description="UM accounts with no deactivation date yet")
+    um_no_account: int = Field(default=0, description="Resignees with no UM account")
+    tp_deactivated: int = Field(default=0, description="Third party accounts deactivated")
+    tp_late: int = Field(default=0, description="Third party deactivations that were late")
+    tp_pending: int = Field(default=0, description="Third party accounts with no deactivation date yet")
+    tp_no_account: int = Field(default=0, description="Resignees with no third party accounts")
+    email_deactivated: int = Field(default=0, description="Email accounts deactivated")
+    email_late: int = Field(default=0, description="Email deactivations that were late")
+    email_pending: int = Field(default=0, description="Email accounts with no deactivation date yet")
+    email_no_account: int = Field(default=0, description="Resignees with no email account")
+    windows_deactivated: int = Field(default=0, description="Windows accounts deactivated")
+    windows_late: int = Field(default=0, description="Windows deactivations that were late")
+    windows_pending: int = Field(default=0, description="Windows accounts with no deactivation date yet")
+    windows_no_account: int = Field(default=0, description="Resignees with no Windows account")
+
+class ResigneeDeactivationDays(SQLModel, table=True):
+    """Histogram of days from last day to deactivation per month and account, for medians."""
+    __tablename__ = "resignee_deactivation_days"
+
+    month: str = Field(primary_key=True, description="Month of last day, YYYY-MM")
+    account: str = Field(primary_key=True, description="Late flag column prefix: um, tp, email or windows")
+    days: int = Field(primary_key=True, description="Days from last day to deactivation")
+    resignees: int = Field(default=0, description="Resignees")
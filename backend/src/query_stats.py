@@ -0,0 +1,127 @@
+# Per-request SQL accounting through SQLAlchemy cursor-execute events: how
+# many statements a request ran and how long the database took, plus a log
+# line for every statement slower than a threshold. Unlike SQL_ECHO it is
+# cheap enough for production; statement parameters are never logged since
+# they can carry PII.
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+# Statements at least this slow are logged with their duration
+SLOW_QUERY_MS = float(os.environ.get("SQL_SLOW_QUERY_MS", 250))
+# Requests running more statements than this get a warning: usually a per-row lookup in a loop
+QUERY_COUNT_WARNING = int(os.environ.get("SQL_QUERY_COUNT_WARNING", 50))
+# Adds a Server-Timing header (visible in the browser's network panel) to every response
+SERVER_TIMING = _env_flag("SQL_SERVER_TIMING")
+MAX_LOGGED_STATEMENT = 500
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    slow: int = 0
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"'
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+def current_query_stats() -> QueryStats | None:
+    return _current.get()
+
+@contextmanager
+def untracked_queries() -> Iterator[None]:
+    """
+    Leave the statements run inside out of the current request's QueryStats,
+    e.g. schema setup and migrations when /db-path opens a new file. Slow
+    statements are still logged.
+    """
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+def _statement_excerpt(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > MAX_LOGGED_STATEMENT:
+        return statement[:MAX_LOGGED_STATEMENT] + "..."
+    return statement
+
+def instrument_engine(target: Engine) -> None:
+    """Time every statement `target` executes. For async engines pass `.sync_engine`."""
+
+    @event.listens_for(target, "before_cursor_execute")
+    def before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(target, "after_cursor_execute")
+    def after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            if stats is not None:
+                stats.slow += 1
+            logger.warning("Slow query (%.0f ms%s): %s", elapsed * 1000,
+                           ", executemany" if executemany else "", _statement_excerpt(statement))
+
+    # A failed statement never reaches after_cursor_execute
+    @event.listens_for(target, "handle_error")
+    def handle_error(exception_context: Any) -> None:
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
+
+class QueryStatsMiddleware:
+    """
+    Collects QueryStats for each HTTP request. With SQL_SERVER_TIMING set the
+    totals go out as a Server-Timing header; for streamed responses that only
+    covers the statements run before the first byte.
+    """
+
+    def __init__(self, app: Any, server_timing: bool = SERVER_TIMING, warn_after: int = QUERY_COUNT_WARNING):
+        self.app = app
+        self.server_timing = server_timing
+        self.warn_after = warn_after
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_wrapper(message: dict[str, Any]) -> None:
+            if self.server_timing and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            if stats.count > self.warn_after:
+                route = scope.get("route")
+                logger.warning(
+                    "%s %s ran %d queries (%.1f ms in the database)",
+                    scope["method"], getattr(route, "path", scope["path"]), stats.count, stats.seconds * 1000,
+                )
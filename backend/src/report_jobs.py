@@ -0,0 +1,206 @@
+# Report exports generated in the background. A job renders its CSV/XLSX
+# file in a separate process, so a large export neither holds an HTTP
+# connection open nor competes with the event loop for the GIL. Clients
+# poll the job for progress and download the file once it is done; finished
+# files are deleted after a TTL.
+
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Iterator
+
+from sqlmodel import Session, create_engine, select
+from sqlalchemy.pool import NullPool
+
+from src.crypto_utils import ENCRYPTED_FIELDS, encryption_enabled, decrypt_many
+from src.models import Resignee
+from src.schemas import ReportJobStatus
+from src.services import build_report_data, generate_csv_report, generate_xls_report
+
+JOB_BATCH_SIZE = 1000
+
+# Set in each worker process by _init_worker
+_progress: Any = None
+
+def _init_worker(progress: Any) -> None:
+    global _progress
+    _progress = progress
+    # Exports yield to the interactive server process where the OS allows it
+    if hasattr(os, "nice"):
+        os.nice(5)
+
+def _decrypted_pii(resignees: list[Resignee]) -> list[dict[str, Any]]:
+    if not encryption_enabled():
+        return [{field: getattr(r, field) for field in ENCRYPTED_FIELDS} for r in resignees]
+    values = decrypt_many([getattr(r, field) for r in resignees for field in ENCRYPTED_FIELDS])
+    width = len(ENCRYPTED_FIELDS)
+    return [dict(zip(ENCRYPTED_FIELDS, values[i:i + width])) for i in range(0, len(values), width)]
+
+def generate_report_file(job_id: str, db_path: str, start: date, end: date, format: str, output_path: str) -> int:
+    """
+    Runs in a worker process: write the report for [start, end] to
+    output_path, reporting rows written after each batch. Returns the row count.
+    """
+    engine = create_engine(f"sqlite:///{db_path}", poolclass=NullPool)
+    statement = (
+        select(Resignee)
+        .where(Resignee.last_day >= start)
+        .where(Resignee.last_day <= end)
+        .execution_options(yield_per=JOB_BATCH_SIZE)
+    )
+    rows_written = 0
+    _progress.put((job_id, rows_written))
+    try:
+        with Session(engine) as session:
+            partitions = session.exec(statement).partitions()
+            if format == "csv":
+                with open(output_path, "w", newline="", encoding="utf-8") as f:
+                    for partition in partitions:
+                        generate_csv_report(f, build_report_data(partition, _decrypted_pii(partition)), rows_written == 0)
+                        rows_written += len(partition)
+                        _progress.put((job_id, rows_written))
+                    if rows_written == 0:
+                        generate_csv_report(f, [], True)
+            else:
+                def report_rows() -> Iterator[dict[str, Any]]:
+                    nonlocal rows_written
+                    for partition in partitions:
+                        yield from build_report_data(partition, _decrypted_pii(partition))
+                        rows_written += len(partition)
+                        _progress.put((job_id, rows_written))
+                generate_xls_report(output_path, report_rows())
+    finally:
+        engine.dispose()
+    return rows_written
+
+@dataclass
+class ReportJob:
+    id: str
+    format: str
+    start: date
+    end: date
+    path: str
+    rows_total: int
+    status: ReportJobStatus = ReportJobStatus.QUEUED
+    rows_written: int = 0
+    error: str | None = None
+    finished_at: float | None = None
+
+class ReportJobManager:
+    """
+    Report jobs of this process. At most `workers` jobs render at once (one
+    process each) and at most `max_active` may be queued or running; the
+    rest are refused so exports cannot pile up behind each other.
+    """
+
+    def __init__(self, workers: int = 1, max_active: int = 8, ttl_seconds: int = 3600):
+        self.workers = workers
+        self.max_active = max_active
+        self.ttl_seconds = ttl_seconds
+        self._jobs: dict[str, ReportJob] = {}
+        self._pool: ProcessPoolExecutor | None = None
+        self._progress: Any = None
+        self._directory: str | None = None
+        # Jobs finish on the pool's management thread, progress is read on the event loop's
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn everywhere: forking a process that runs an event loop and
+            # aiosqlite threads is not safe, and it is what Windows does anyway
+            context = multiprocessing.get_context("spawn")
+            self._progress = context.Queue()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=context, initializer=_init_worker, initargs=(self._progress,)
+            )
+            self._directory = tempfile.mkdtemp(prefix="report-jobs-")
+        return self._pool
+
+    @property
+    def active_count(self) -> int:
+        return sum(job.status in (ReportJobStatus.QUEUED, ReportJobStatus.RUNNING) for job in self._jobs.values())
+
+    def submit(self, db_path: str, start: date, end: date, format: str, rows_total: int) -> ReportJob:
+        """Queue a job; the caller checks active_count against max_active first."""
+        self.purge_expired()
+        pool = self._get_pool()
+        job_id = uuid.uuid4().hex
+        job = ReportJob(
+            id=job_id, format=format, start=start, end=end, rows_total=rows_total,
+            path=os.path.join(self._directory, f"{job_id}.{format}"),
+        )
+        self._jobs[job_id] = job
+        future = pool.submit(generate_report_file, job_id, db_path, start, end, format, job.path)
+        future.add_done_callback(lambda f: self._finished(job, f))
+        return job
+
+    def get(self, job_id: str) -> ReportJob | None:
+        self._drain_progress()
+        self.purge_expired()
+        return self._jobs.get(job_id)
+
+    def expires_at(self, job: ReportJob) -> datetime | None:
+        if job.finished_at is None:
+            return None
+        return datetime.fromtimestamp(job.finished_at + self.ttl_seconds)
+
+    def _finished(self, job: ReportJob, future: "Future[int]") -> None:
+        with self._lock:
+            if future.cancelled():
+                job.status, job.error = ReportJobStatus.FAILED, "Cancelled"
+            elif future.exception() is not None:
+                job.status, job.error = ReportJobStatus.FAILED, str(future.exception())
+            else:
+                job.rows_written = future.result()
+                job.status = ReportJobStatus.DONE
+            job.finished_at = time.time()
+        if job.status == ReportJobStatus.FAILED and os.path.exists(job.path):
+            os.remove(job.path)
+
+    def _drain_progress(self) -> None:
+        if self._progress is None:
+            return
+        while True:
+            try:
+                job_id, rows_written = self._progress.get_nowait()
+            except queue.Empty:
+                return
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+            with self._lock:
+                # Late progress messages must not undo a finished state
+                if job.finished_at is None:
+                    job.status = ReportJobStatus.RUNNING
+                    job.rows_written = rows_written
+
+    def purge_expired(self) -> None:
+        now = time.time()
+        for job in list(self._jobs.values()):
+            if job.finished_at is not None and job.finished_at + self.ttl_seconds <= now:
+                del self._jobs[job.id]
+                if os.path.exists(job.path):
+                    os.remove(job.path)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+        self._jobs.clear()
+
+report_jobs = ReportJobManager(
+    workers=int(os.environ.get("REPORT_JOB_WORKERS", 1)),
+    max_active=int(os.environ.get("REPORT_JOB_MAX_ACTIVE", 8)),
+    ttl_seconds=int(os.environ.get("REPORT_JOB_TTL_SECONDS", 3600)),
+)
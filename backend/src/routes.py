@@ -1,17 +1,35 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import APIRouter, HTTPException, Body, Path, Query, Depends
-from src.schemas import ResigneeDisplay, ResigneeCreate, Account, EditDate, Status
-from src.services import parse_resignee_text, generate_csv_report, generate_xls_report, is_late
-from datetime import datetime, timedelta
-from src.database import get_engine
-from io import StringIO, BytesIO
-from fastapi.responses import Response
+from fastapi import APIRouter, HTTPException, Body, Path, Query, Depends, Request
+from src.schemas import ResigneeDisplay, ResigneeCreate, EditDate, RejectedResignee, ResigneeIngestResult, ResigneeParseError, PendingAccount, DeactivationDateUpdate, DeactivationDateResult, ResigneeFilter, BulkProcessRequest, BulkProcessResult, AccountLateness, LatenessGroup, LatenessStats, ReportJobRequest, ReportJobStatus, ReportJobInfo
+from src.services import ResigneeTextParser, XlsxReportWriter, ReportCache, build_report_data, generate_csv_report, refresh_late_flags, compute_late_flags, is_no_account
+from datetime import date, datetime, timedelta
+from src.database import get_async_session, leased_session, EngineEntry, bump_data_version, event_id, get_data_fingerprint, get_file_state
+from src import database
+from src.events import change_broker, format_sse, RESYNC
+from src.metrics import metrics, PhaseTimer
+from src.report_jobs import report_jobs, ReportJob
+from io import StringIO
+from fastapi.responses import Response, StreamingResponse, FileResponse
+from starlette.background import BackgroundTask
+from fastapi.concurrency import run_in_threadpool
 import hashlib
-from typing import Any
-from sqlmodel import Session, select, desc
-from src.models import Resignee
+from typing import Any, Iterable, Iterator, AsyncIterator, Sequence, Mapping
+import codecs
+import asyncio
+import base64
+import heapq
+import json
+import os
+import tempfile
+import logging
+import re
+from sqlmodel import select, desc, col, insert, update, bindparam, or_, and_, tuple_, func, case, cast, literal, literal_column, union_all, table, column, Integer
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+from src.models import Resignee, ResigneeMonthlyStats, ResigneeDeactivationDays
+from src.crypto_utils import ENCRYPTED_FIELDS, encryption_enabled, blind_index, encrypt_field, encrypt_row, decrypt_in_pool
 
 router = APIRouter(
     prefix="/resignees",
@@ -19,152 +37,431 @@ router = APIRouter(
 )
 db_router = APIRouter(tags=["db"])
 
-def get_session():
-    engine = get_engine()
-    with Session(engine) as session:
+logger = logging.getLogger(__name__)
+
+REPORT_BATCH_SIZE = 1000
+MAX_PAGE_SIZE = 500
+SSE_KEEPALIVE_SECONDS = 15
+# Entries per duplicate lookup/insert; keeps IN (...) lists under SQLite's
+# bound-parameter limit on older builds
+INGEST_BATCH_SIZE = 500
+MAX_BULK_UPDATES = 1000
+
+report_cache = ReportCache(max_bytes=int(os.environ.get("REPORT_CACHE_MAX_BYTES", 64 * 1024 * 1024)))
+metrics.register_collector(lambda: [
+    ("report_cache_hits_total", "Report downloads served from the report cache.", "counter", report_cache.hits),
+    ("report_cache_misses_total", "Report downloads that had to be generated.", "counter", report_cache.misses),
+    ("report_cache_evictions_total", "Cached reports evicted to stay under the size limit.", "counter", report_cache.evictions),
+    ("report_cache_invalidations_total", "Cached reports dropped because their data changed.", "counter", report_cache.invalidations),
+    ("report_cache_bytes", "Size of the cached report bodies.", "gauge", report_cache.size),
+])
+
+async def get_session():
+    async for session in get_async_session():
         yield session
 
 def hash_employee_no(employee_no: str) -> str:
-    return hashlib.sha256(employee_no.encode()).hexdigest()
+    # Blind index stored in employee_no_hash when PII encryption is on
+    return blind_index(employee_no)
+
+def employee_no_matches(employee_no: str) -> Any:
+    """WHERE clause for one employee; uses the blind index when employee_no is encrypted."""
+    if encryption_enabled():
+        return Resignee.employee_no_hash == hash_employee_no(employee_no)
+    return Resignee.employee_no == employee_no
+
+async def fetch_resignees(session: AsyncSession, employee_nos: Sequence[str]) -> dict[str, Resignee]:
+    """Load many resignees keyed by (plaintext) employee_no, in chunks of IN-list size."""
+    found: dict[str, Resignee] = {}
+    for i in range(0, len(employee_nos), INGEST_BATCH_SIZE):
+        chunk = employee_nos[i:i + INGEST_BATCH_SIZE]
+        if encryption_enabled():
+            keys = {hash_employee_no(no): no for no in chunk}
+            statement = select(Resignee).where(col(Resignee.employee_no_hash).in_(list(keys)))
+            for resignee in (await session.exec(statement)).all():
+                found[keys[resignee.employee_no_hash]] = resignee
+        else:
+            statement = select(Resignee).where(col(Resignee.employee_no).in_(list(chunk)))
+            for resignee in (await session.exec(statement)).all():
+                found[resignee.employee_no] = resignee
+    return found
+
+async def decrypt_resignees(resignees: Sequence[Resignee]) -> list[dict[str, Any]]:
+    """
+    Plaintext PII fields per row, decrypted in the worker pool when encryption
+    is on. ORM objects are left untouched so nothing plaintext is flushed back.
+    """
+    if not encryption_enabled():
+        return [{field: getattr(r, field) for field in ENCRYPTED_FIELDS} for r in resignees]
+    tokens = [getattr(r, field) for r in resignees for field in ENCRYPTED_FIELDS]
+    values = await decrypt_in_pool(tokens)
+    width = len(ENCRYPTED_FIELDS)
+    return [dict(zip(ENCRYPTED_FIELDS, values[i:i + width])) for i in range(0, len(values), width)]
+
+async def ingest_resignee_batch(
+    session: AsyncSession,
+    entries: list[ResigneeCreate],
+    seen: set[str],
+    now: datetime
+) -> tuple[list[ResigneeDisplay], list[RejectedResignee]]:
+    """
+    Insert one batch of parsed entries, skipping duplicates (already stored,
+    or in `seen` from earlier in the same paste) and invalid dates.
+    Does not commit; the caller commits once for the whole paste.
+    """
+    rows: list[dict[str, Any]] = []
+    accepted: list[ResigneeCreate] = []
+    rejected: list[RejectedResignee] = []
+
+    for entry in entries:
+        if entry.employee_no in seen:
+            rejected.append(RejectedResignee(employee_no=entry.employee_no, reason="Duplicate employee_no in submitted text"))
+            continue
+
+        try:
+            date_hired = datetime.strptime(entry.date_hired, "%m/%d/%Y").date()
+            last_day = datetime.strptime(entry.last_day, "%m/%d/%Y").date()
+        except ValueError:
+            rejected.append(RejectedResignee(employee_no=entry.employee_no, reason="Invalid date format. Use MM/DD/YYYY."))
+            continue
+        # Only once the row is valid, so a corrected copy later in the paste is still accepted
+        seen.add(entry.employee_no)
+
+        rows.append({
+            **entry.model_dump(exclude={'date_hired', 'last_day'}),
+            "date_hired": date_hired,
+            "last_day": last_day,
+            "date_hr_emailed": now,
+            "processed_date_time": None,
+            "um_date_deac": None,
+            "tp_date_deac": None,
+            "email_date_deac": None,
+            "windows_date_deac": None,
+            "remarks": None,
+            "um_late": False,
+            "tp_late": False,
+            "email_late": False,
+            "windows_late": False,
+        })
+        accepted.append(entry)
+
+    if not rows:
+        return [], rejected
+
+    # One set-based lookup for the whole batch instead of one SELECT per entry
+    if encryption_enabled():
+        hashes = {hash_employee_no(row["employee_no"]): row["employee_no"] for row in rows}
+        existing = {hashes[h] for h in (await session.exec(
+            select(Resignee.employee_no_hash).where(col(Resignee.employee_no_hash).in_(list(hashes)))
+        )).all()}
+    else:
+        existing = set((await session.exec(
+            select(Resignee.employee_no).where(col(Resignee.employee_no).in_([row["employee_no"] for row in rows]))
+        )).all())
+
+    if existing:
+        rejected.extend(
+            RejectedResignee(employee_no=row["employee_no"], reason="Duplicate employee_no detected")
+            for row in rows if row["employee_no"] in existing
+        )
+        rows = [row for row in rows if row["employee_no"] not in existing]
+        accepted = [entry for entry in accepted if entry.employee_no not in existing]
+
+    if rows:
+        if encryption_enabled():
+            rows = await run_in_threadpool(lambda: [encrypt_row(row) for row in rows])
+        await session.exec(insert(Resignee), params=rows)
+
+    date_hr_emailed = now.strftime("%m-%d-%Y")
+    added = [
+        ResigneeDisplay(
+            **entry.model_dump(exclude={'last_name', 'first_name', 'middle_name'}),
+            name=f"{entry.last_name}, {entry.first_name} {entry.middle_name}",
+            date_hr_emailed=date_hr_emailed,
+            um=None,
+            third_party=None,
+            email=None,
+            windows=None,
+            remarks=None,
+            um_late=False,
+            third_party_late=False,
+            email_late=False,
+            windows_late=False,
+            processed_date_time=None
+        )
+        for entry in accepted
+    ]
+    return added, rejected
 
 # Endpoint accepting raw text (details) of resignees; will parse and add data to database
-@router.post("", response_model=list[ResigneeDisplay])
+@router.post(
+    "",
+    response_model=ResigneeIngestResult,
+    openapi_extra={"requestBody": {"required": True, "content": {"text/plain": {"schema": {"type": "string"}}}}}
+)
 async def add_resignees(
-    resignees: str = Body(..., media_type="text/plain"),
-    session: Session = Depends(get_session)
+    request: Request,
+    session: AsyncSession = Depends(get_session)
 ):
     """
     Handle raw resignee details and return parsed data per employee.
-    Encrypt all fields except dates/timestamps before storing.
-    Raise error if employee_no is not unique.
+    The body is parsed as it streams in and inserted in batches within one
+    transaction. Duplicates (already stored, or repeated within the same paste)
+    and entries with invalid dates are rejected individually; malformed
+    records are reported in `errors`.
     """
     try:
-        entries: list[ResigneeCreate] = parse_resignee_text(resignees)
-        cleaned_entries: list[ResigneeDisplay] = []
+        parser = ResigneeTextParser()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        now = datetime.now()
 
-        for entry in entries:
-            employee_no= entry.employee_no
-            
-            # Check for duplicate
-            existing = session.exec(
-                select(Resignee)
-                .where(Resignee.employee_no == employee_no)
-            ).first()
-            
-            if existing:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Duplicate employee_no detected: {entry.employee_no}"
-                )
-
-            # Create new resignee record
-            resignee = Resignee(
-                employee_no=entry.employee_no,
-                last_name=entry.last_name,
-                first_name=entry.first_name,
-                middle_name=entry.middle_name,
-                cost_center=entry.cost_center,
-                position_title=entry.position_title,
-                rank=entry.rank,
-                department=entry.department,
-                date_hired=datetime.strptime(entry.date_hired, "%m/%d/%Y").date(),
-                last_day=datetime.strptime(entry.last_day, "%m/%d/%Y").date(),
-                date_hr_emailed=datetime.now(),
-                processed_date_time=None,
-                um_date_deac=None,
-                tp_date_deac=None,
-                email_date_deac=None,
-                windows_date_deac=None,
-                remarks=None
+        result = ResigneeIngestResult(added=[], rejected=[], errors=[])
+        seen: set[str] = set()
+        batch: list[ResigneeCreate] = []
+
+        async def flush() -> None:
+            added, rejected = await ingest_resignee_batch(session, batch, seen, now)
+            result.added.extend(added)
+            result.rejected.extend(rejected)
+            batch.clear()
+
+        async def consume(items: Iterator[ResigneeCreate | ResigneeParseError]) -> None:
+            for item in items:
+                if isinstance(item, ResigneeParseError):
+                    result.errors.append(item)
+                    continue
+                batch.append(item)
+                if len(batch) >= INGEST_BATCH_SIZE:
+                    await flush()
+
+        async for chunk in request.stream():
+            await consume(parser.feed(decoder.decode(chunk)))
+        await consume(parser.feed(decoder.decode(b"", final=True)))
+        await consume(parser.close())
+        if batch:
+            await flush()
+
+        if result.added:
+            await session.commit()
+            publish_change(
+                "created",
+                employee_nos=[entry.employee_no for entry in result.added],
+                last_days=[datetime.strptime(entry.last_day, "%m/%d/%Y").date() for entry in result.added],
             )
-
-            session.add(resignee)
-            
-            # For response
-            cleaned_entries.append(ResigneeDisplay(
-                **entry.model_dump(exclude={'last_name', 'first_name', 'middle_name'}),
-                name=f"{entry.last_name}, {entry.first_name} {entry.middle_name}",
-                date_hr_emailed=datetime.now().strftime("%m-%d-%Y"),
-                um=None,
-                third_party=None,
-                email=None,
-                windows=None,
-                remarks=None,
-                um_late=False,
-                third_party_late=False,
-                email_late=False,
-                windows_late=False,
-                processed_date_time=None
-            ))
-
-        session.commit()
-        return cleaned_entries
+        return result
 
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=500, detail=str(e))
     
 
+def publish_change(
+    event_type: str,
+    employee_no: str | None = None,
+    *,
+    last_days: Iterable[date] | None = None,
+    **fields: Any,
+) -> None:
+    """
+    Record a committed write: bump the data version, drop cached reports
+    covering the written rows' `last_days` (all of them if not given) and
+    push a change event to /resignees/events subscribers. Field names match
+    ResigneeDisplay.
+    """
+    version = bump_data_version()
+    report_cache.invalidate(last_days, get_file_state)
+    if employee_no is not None:
+        change_broker.publish(event_type, version, employee_no=employee_no, fields=fields)
+    else:
+        change_broker.publish(event_type, version, **fields)
+
+def late_fields(resignee: Resignee) -> dict[str, bool]:
+    return {
+        "um_late": resignee.um_late,
+        "third_party_late": resignee.tp_late,
+        "email_late": resignee.email_late,
+        "windows_late": resignee.windows_late,
+    }
+
+def to_resignee_display(entry: Resignee, pii: Mapping[str, Any]) -> ResigneeDisplay:
+    """`pii` holds the plaintext ENCRYPTED_FIELDS for the row (see decrypt_resignees)."""
+    return ResigneeDisplay(
+        employee_no=pii["employee_no"],
+        date_hired=entry.date_hired.strftime("%Y-%m-%d") if entry.date_hired else "",
+        cost_center=entry.cost_center,
+        name=f"{pii['last_name']}, {pii['first_name']} {pii['middle_name']}",
+        position_title=entry.position_title,
+        rank=entry.rank,
+        department=entry.department,
+        last_day=entry.last_day.strftime("%Y-%m-%d") if entry.last_day else "",
+        date_hr_emailed=entry.date_hr_emailed.strftime("%Y-%m-%d") if entry.date_hr_emailed else "",
+        um=entry.um_date_deac.strftime("%Y-%m-%d") if entry.um_date_deac else "",
+        third_party=entry.tp_date_deac.strftime("%Y-%m-%d") if entry.tp_date_deac else "",
+        email=entry.email_date_deac.strftime("%Y-%m-%d") if entry.email_date_deac else "",
+        windows=entry.windows_date_deac.strftime("%Y-%m-%d") if entry.windows_date_deac else "",
+        remarks=pii["remarks"],
+        um_late=entry.um_late,
+        third_party_late=entry.tp_late,
+        email_late=entry.email_late,
+        windows_late=entry.windows_late,
+        processed_date_time=entry.processed_date_time.strftime("%Y-%m-%d %H:%M:%S") if entry.processed_date_time else ""
+    )
+
+def encode_cursor(entry: Resignee) -> str:
+    raw = json.dumps([entry.date_hr_emailed.isoformat(), entry.employee_no])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        hr, employee_no = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(hr), str(employee_no)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def list_etag(request: Request) -> str:
+    # The 24-hour "recently processed" window moves even without writes,
+    # so the hour is part of the tag too
+    key = f"{get_data_fingerprint()}|{datetime.now():%Y%m%d%H}|{request.url.query}"
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+def parse_if_none_match(header: str | None) -> set[str]:
+    if not header:
+        return set()
+    return {tag.strip() for tag in header.split(",")}
+
+PENDING_ACCOUNT_COLUMNS = {
+    PendingAccount.UM: Resignee.um_date_deac,
+    PendingAccount.THIRD_PARTY: Resignee.tp_date_deac,
+    PendingAccount.EMAIL: Resignee.email_date_deac,
+    PendingAccount.WINDOWS: Resignee.windows_date_deac,
+}
+
+def resignee_filters(criteria: ResigneeFilter) -> list[Any]:
+    """WHERE clauses shared by the dashboard list and the bulk endpoints."""
+    filters: list[Any] = []
+    if criteria.department is not None:
+        filters.append(Resignee.department == criteria.department)
+    if criteria.cost_center is not None:
+        filters.append(Resignee.cost_center == criteria.cost_center)
+    if criteria.late_only:
+        filters.append(or_(Resignee.um_late, Resignee.tp_late, Resignee.email_late, Resignee.windows_late))
+    if criteria.pending is not None:
+        filters.append(PENDING_ACCOUNT_COLUMNS[criteria.pending] == None)
+    if criteria.all_deactivated:
+        filters.append(and_(*(column != None for column in PENDING_ACCOUNT_COLUMNS.values())))
+    return filters
+
 # Endpoint serving list of unprocessed resignees to client (frontend) 
-@router.get("")
-async def get_all_unprocessed_resignees(session: Session = Depends(get_session)):
+@router.get("", response_model=list[ResigneeDisplay])
+async def get_all_unprocessed_resignees(
+    request: Request,
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    department: str | None = None,
+    cost_center: str | None = None,
+    late_only: bool = False,
+    pending: PendingAccount | None = Query(default=None, description="Only rows with this account not yet deactivated"),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Unprocessed resignees plus those processed in the last 24 hours, newest
+    HR email first. Pass `limit` to page through the list: the cursor for the
+    next page is returned in the X-Next-Cursor header (absent on the last page).
+    Responses carry an ETag of the data version and query; a matching
+    If-None-Match gets a 304 without touching the table.
+    """
     try:
-        # Get unprocessed resignees
-        statement = select(Resignee).where(
-            Resignee.processed_date_time == None
-        ).order_by(desc(Resignee.date_hr_emailed))
-        unprocessed = session.exec(statement).all()
+        etag = list_etag(request)
+        if etag in parse_if_none_match(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+
+        filters = resignee_filters(ResigneeFilter(
+            department=department, cost_center=cost_center, late_only=late_only, pending=pending
+        ))
+        if cursor is not None:
+            # Row-value comparison so SQLite can seek straight to the cursor in the index
+            filters.append(tuple_(Resignee.date_hr_emailed, Resignee.employee_no) < tuple_(*decode_cursor(cursor)))
+
+        order = (desc(Resignee.date_hr_emailed), desc(Resignee.employee_no))
+        fetch = limit + 1 if limit is not None else None
+
+        # Unprocessed resignees (served in order by the partial index) and the
+        # recently processed ones (last 24 hours, a handful of rows) are queried
+        # separately so neither has to scan past years of processed history
+        statement = select(Resignee).where(Resignee.processed_date_time == None, *filters).order_by(*order).limit(fetch)
+        unprocessed = (await session.exec(statement)).all()
 
-        # Get recently processed (last 24 hours)
         past_day_date = datetime.now() - timedelta(days=1)
         statement = (
             select(Resignee)
             .where(Resignee.processed_date_time != None)
             .where(Resignee.processed_date_time >= past_day_date)
+            .where(*filters)
+            .order_by(*order)
+            .limit(fetch)
         )
-        recently_processed = session.exec(statement).all()
+        recently_processed = (await session.exec(statement)).all()
+
+        all_resignees: list[Resignee] = list(heapq.merge(
+            unprocessed, recently_processed,
+            key=lambda r: (r.date_hr_emailed, r.employee_no),
+            reverse=True
+        ))
+
+        if limit is not None and len(all_resignees) > limit:
+            all_resignees = all_resignees[:limit]
+            response.headers["X-Next-Cursor"] = encode_cursor(all_resignees[-1])
 
-        all_resignees: list[Resignee] = list(unprocessed) + list(recently_processed)
         cleaned_entries: list[ResigneeDisplay] = []
 
-        for entry in all_resignees:
+        for entry, pii in zip(all_resignees, await decrypt_resignees(all_resignees)):
             try:
-
-                cleaned_entries.append(ResigneeDisplay(
-                    employee_no=entry.employee_no,
-                    date_hired=entry.date_hired.strftime("%Y-%m-%d") if entry.date_hired else "",
-                    cost_center=entry.cost_center,
-                    name=f"{entry.last_name}, {entry.first_name} {entry.middle_name}",
-                    position_title=entry.position_title,
-                    rank=entry.rank,
-                    department=entry.department,
-                    last_day=entry.last_day.strftime("%Y-%m-%d") if entry.last_day else "",
-                    date_hr_emailed=entry.date_hr_emailed.strftime("%Y-%m-%d") if entry.date_hr_emailed else "",
-                    um=entry.um_date_deac.strftime("%Y-%m-%d") if entry.um_date_deac else "",
-                    third_party=entry.tp_date_deac.strftime("%Y-%m-%d") if entry.tp_date_deac else "",
-                    email=entry.email_date_deac.strftime("%Y-%m-%d") if entry.email_date_deac else "",
-                    windows=entry.windows_date_deac.strftime("%Y-%m-%d") if entry.windows_date_deac else "",
-                    remarks=entry.remarks,
-                    um_late=is_late(entry.last_day, entry.um_date_deac, entry.date_hr_emailed, Account.UM),
-                    third_party_late=is_late(entry.last_day, entry.tp_date_deac, entry.date_hr_emailed, Account.TP),
-                    email_late=is_late(entry.last_day, entry.email_date_deac, entry.date_hr_emailed, Account.EM),
-                    windows_late=is_late(entry.last_day, entry.windows_date_deac, entry.date_hr_emailed, Account.WN),
-                    processed_date_time=entry.processed_date_time.strftime("%Y-%m-%d %H:%M:%S") if entry.processed_date_time else ""
-                ))
+                cleaned_entries.append(to_resignee_display(entry, pii))
             except Exception as inner_e:
-                print(f"Error processing entry {entry.employee_no}: {str(inner_e)}")
+                logger.warning("Error processing entry %s: %s", entry.employee_no, inner_e)
                 continue
 
         return cleaned_entries
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/events")
+async def stream_resignee_events(request: Request):
+    """
+    Server-sent events for resignee changes made through this server.
+    Event types: created, updated, processed, unprocessed and resync (reload
+    the whole list). Each event's id is the process epoch and the data
+    version after the change, so ids from before a restart never match.
+    """
+    async def event_stream() -> AsyncIterator[bytes]:
+        with change_broker.subscribe() as queue:
+            # A reconnecting client that missed events has to reload
+            last_event_id = request.headers.get("last-event-id")
+            if last_event_id is not None and last_event_id != event_id(database.data_version):
+                yield format_sse(RESYNC, database.data_version, {})
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.put("/{employee_no}/last_day")    
 async def edit_employee_last_day(
     employee_no: str = Path(...),
     last_day: str = Body(..., media_type="text/plain"),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """
     Edit an employee's recorded last day.
@@ -172,14 +469,21 @@ async def edit_employee_last_day(
     """
     try:
         parsed_last_day = datetime.strptime(last_day, "%Y-%m-%d").date()
-        statement = select(Resignee).where(Resignee.employee_no == employee_no)
-        result = session.exec(statement).first()
+        statement = select(Resignee).where(employee_no_matches(employee_no))
+        result = (await session.exec(statement)).first()
         if not result:
             raise HTTPException(status_code=404, detail="Employee not found")
         
+        previous_last_day = result.last_day
         result.last_day = parsed_last_day
+        refresh_late_flags(result)
         session.add(result)
-        session.commit()
+        await session.commit()
+        publish_change(
+            "updated", employee_no,
+            last_days=[previous_last_day, parsed_last_day],
+            last_day=parsed_last_day.strftime("%Y-%m-%d"), **late_fields(result),
+        )
         return {"message": f"Changed employee {employee_no} last day to {parsed_last_day}."}
 
     except ValueError:
@@ -192,27 +496,23 @@ async def edit_employee_last_day(
 async def edit_um_deactivation_date(
     employee_no: str = Path(...),
     um_date_deac: str = Body(..., media_type="text/plain"),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     try:
         parsed_um_date = datetime.strptime(um_date_deac, "%Y-%m-%d").date()
-        statement = select(Resignee).where(Resignee.employee_no == employee_no)
-        resignee = session.exec(statement).first()
+        statement = select(Resignee).where(employee_no_matches(employee_no))
+        resignee = (await session.exec(statement)).first()
 
         if not resignee:
             raise HTTPException(status_code=404, detail="Employee not found")
 
         # Update UM deactivation date
         resignee.um_date_deac = parsed_um_date
-        session.commit()
-
-        # Determine lateness
-        late = is_late(
-            resigned=resignee.last_day,
-            deac=parsed_um_date if parsed_um_date else None,
-            hr=resignee.date_hr_emailed,
-            acc=Account.UM
-        )
+        refresh_late_flags(resignee)
+        await session.commit()
+        publish_change("updated", employee_no, last_days=[resignee.last_day], um=um_date_deac, um_late=resignee.um_late)
+
+        late = resignee.um_late
 
         return EditDate(
             message=f"Set employee {employee_no} Batch Deactivation from UM date to {um_date_deac}.",
@@ -229,27 +529,23 @@ async def edit_um_deactivation_date(
 async def edit_tp_deactivation_date(
     employee_no: str = Path(...),
     tp_date_deac: str = Body(..., media_type="text/plain"),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     try:
         parsed_tp_date = datetime.strptime(tp_date_deac, "%Y-%m-%d").date()
-        statement = select(Resignee).where(Resignee.employee_no == employee_no)
-        resignee = session.exec(statement).first()
+        statement = select(Resignee).where(employee_no_matches(employee_no))
+        resignee = (await session.exec(statement)).first()
 
         if not resignee:
             raise HTTPException(status_code=404, detail="Employee not found")
 
         # Update TP deactivation date
         resignee.tp_date_deac = parsed_tp_date
-        session.commit()
-
-        # Determine lateness
-        late = is_late(
-            resigned=resignee.last_day,
-            deac=parsed_tp_date if parsed_tp_date else None,
-            hr=resignee.date_hr_emailed,
-            acc=Account.TP
-        )
+        refresh_late_flags(resignee)
+        await session.commit()
+        publish_change("updated", employee_no, last_days=[resignee.last_day], third_party=tp_date_deac, third_party_late=resignee.tp_late)
+
+        late = resignee.tp_late
 
         return EditDate(
             message=f"Set employee {employee_no} Third Party Account deactivation date to {tp_date_deac}.",
@@ -266,27 +562,23 @@ async def edit_tp_deactivation_date(
 async def edit_email_deactivation_date(
     employee_no: str = Path(...),
     email_date_deac: str = Body(..., media_type="text/plain"),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     try:
         parsed_email_date = datetime.strptime(email_date_deac, "%Y-%m-%d").date()
-        statement = select(Resignee).where(Resignee.employee_no == employee_no)
-        resignee = session.exec(statement).first()
+        statement = select(Resignee).where(employee_no_matches(employee_no))
+        resignee = (await session.exec(statement)).first()
 
         if not resignee:
             raise HTTPException(status_code=404, detail="Employee not found")
 
         # Update Email deactivation date
         resignee.email_date_deac = parsed_email_date
-        session.commit()
-
-        # Determine lateness
-        late = is_late(
-            resigned=resignee.last_day,
-            deac=parsed_email_date if parsed_email_date else None,
-            hr=resignee.date_hr_emailed,
-            acc=Account.EM
-        )
+        refresh_late_flags(resignee)
+        await session.commit()
+        publish_change("updated", employee_no, last_days=[resignee.last_day], email=email_date_deac, email_late=resignee.email_late)
+
+        late = resignee.email_late
 
         return EditDate(
             message=f"Set employee {employee_no} Email Deactivation date to {email_date_deac}.",
@@ -303,27 +595,23 @@ async def edit_email_deactivation_date(
 async def edit_windows_deactivation_date(
     employee_no: str = Path(...),
     windows_date_deac: str = Body(..., media_type="text/plain"),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     try:
         parsed_win_date = datetime.strptime(windows_date_deac, "%Y-%m-%d").date()
-        statement = select(Resignee).where(Resignee.employee_no == employee_no)
-        resignee = session.exec(statement).first()
+        statement = select(Resignee).where(employee_no_matches(employee_no))
+        resignee = (await session.exec(statement)).first()
 
         if not resignee:
             raise HTTPException(status_code=404, detail="Employee not found")
 
         # Update WN deactivation date
         resignee.windows_date_deac = parsed_win_date
-        session.commit()
-
-        # Determine lateness
-        late = is_late(
-            resigned=resignee.last_day,
-            deac=parsed_win_date if parsed_win_date else None,
-            hr=resignee.date_hr_emailed,
-            acc=Account.WN
-        )
+        refresh_late_flags(resignee)
+        await session.commit()
+        publish_change("updated", employee_no, last_days=[resignee.last_day], windows=windows_date_deac, windows_late=resignee.windows_late)
+
+        late = resignee.windows_late
 
         return EditDate(
             message=f"Set employee {employee_no} Windows deactivation date to {windows_date_deac}.",
@@ -336,22 +624,125 @@ async def edit_windows_deactivation_date(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Resignee column and late flag behind each account in bulk updates
+ACCOUNT_DATE_ATTRIBUTES = {
+    PendingAccount.UM: ("um_date_deac", "um_late"),
+    PendingAccount.THIRD_PARTY: ("tp_date_deac", "tp_late"),
+    PendingAccount.EMAIL: ("email_date_deac", "email_late"),
+    PendingAccount.WINDOWS: ("windows_date_deac", "windows_late"),
+}
+
+# Endpoint applying many deactivation dates at once (e.g. after a batch UM run)
+@router.put("/deactivation-dates", response_model=list[DeactivationDateResult])
+async def edit_deactivation_dates(
+    updates: list[DeactivationDateUpdate] = Body(...),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Apply all updates in one transaction: either every row is updated or,
+    if any date is invalid or employee is missing, none are.
+    """
+    if len(updates) > MAX_BULK_UPDATES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_UPDATES} updates per request.")
+
+    try:
+        parsed_dates = [datetime.strptime(change.date, "%Y-%m-%d").date() for change in updates]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
+
+    try:
+        resignees = await fetch_resignees(session, list(dict.fromkeys(change.employee_no for change in updates)))
+        missing = sorted({change.employee_no for change in updates} - resignees.keys())
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Employee not found: {', '.join(missing)}")
+
+        # New dates and late flags are worked out here and written with one
+        # executemany UPDATE, rather than flushing one UPDATE per loaded row
+        deacs = {
+            employee_no: {date_attribute: getattr(resignee, date_attribute) for date_attribute, _ in ACCOUNT_DATE_ATTRIBUTES.values()}
+            for employee_no, resignee in resignees.items()
+        }
+        for change, parsed_date in zip(updates, parsed_dates):
+            date_attribute, _ = ACCOUNT_DATE_ATTRIBUTES[change.account]
+            deacs[change.employee_no][date_attribute] = parsed_date
+        flags = {
+            employee_no: compute_late_flags(resignee.last_day, resignee.date_hr_emailed, deacs[employee_no])
+            for employee_no, resignee in resignees.items()
+        }
+
+        table = Resignee.__table__
+        statement = (
+            update(table)
+            .where(table.c.employee_no == bindparam("b_employee_no"))
+            .values({
+                column: bindparam(f"b_{column}")
+                for date_attribute, flag in ACCOUNT_DATE_ATTRIBUTES.values() for column in (date_attribute, flag)
+            })
+        )
+        await session.exec(statement, params=[
+            {
+                # The stored key, which is a Fernet token when PII is encrypted
+                "b_employee_no": resignee.employee_no,
+                **{f"b_{column}": value for column, value in deacs[employee_no].items()},
+                **{f"b_{flag}": late for flag, late in flags[employee_no].items()},
+            }
+            for employee_no, resignee in resignees.items()
+        ])
+        await session.commit()
+
+        results = [
+            DeactivationDateResult(
+                employee_no=change.employee_no,
+                account=change.account,
+                date=change.date,
+                late=flags[change.employee_no][ACCOUNT_DATE_ATTRIBUTES[change.account][1]]
+            )
+            for change in updates
+        ]
+        publish_change("bulk_updated", last_days=[resignee.last_day for resignee in resignees.values()], rows=[
+            {
+                "employee_no": employee_no,
+                "fields": {
+                    **{
+                        account.value: (deacs[employee_no][date_attribute].strftime("%Y-%m-%d")
+                                        if deacs[employee_no][date_attribute] else None)
+                        for account, (date_attribute, _) in ACCOUNT_DATE_ATTRIBUTES.items()
+                    },
+                    "um_late": flags[employee_no]["um_late"],
+                    "third_party_late": flags[employee_no]["tp_late"],
+                    "email_late": flags[employee_no]["email_late"],
+                    "windows_late": flags[employee_no]["windows_late"],
+                },
+            }
+            for employee_no in resignees
+        ])
+        return results
+
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/{employee_no}/date_hr_emailed")
 async def edit_hr_emailed_date(
     employee_no: str = Path(...),
     date_hr_emailed: str = Body(..., media_type="text/plain"),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     try:
         date_hr = datetime.now()
-        statement = select(Resignee).where(Resignee.employee_no == employee_no)
-        result = session.exec(statement).first()
+        statement = select(Resignee).where(employee_no_matches(employee_no))
+        result = (await session.exec(statement)).first()
 
         if not result:
             raise HTTPException(status_code=404, detail="Employee not found")
         
         result.date_hr_emailed = date_hr
-        session.commit()
+        refresh_late_flags(result)
+        await session.commit()
+        publish_change("updated", employee_no, last_days=[result.last_day], date_hr_emailed=date_hr.strftime("%Y-%m-%d"), **late_fields(result))
         return {"message": f"HR email date updated."}
 
     except ValueError:
@@ -364,29 +755,117 @@ async def edit_hr_emailed_date(
 async def edit_remarks(
     employee_no: str = Path(...),
     remarks: str | None = Body(..., media_type="text/plain"),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     try:
 
-        statement = select(Resignee).where(Resignee.employee_no == employee_no)
-        result = session.exec(statement).first()
+        statement = select(Resignee).where(employee_no_matches(employee_no))
+        result = (await session.exec(statement)).first()
 
         if not result:
             raise HTTPException(status_code=404, detail="Employee not found")
         
-        result.remarks = remarks
-        session.commit()
+        result.remarks = encrypt_field(remarks) if remarks is not None and encryption_enabled() else remarks
+        await session.commit()
+        publish_change("updated", employee_no, last_days=[result.last_day], remarks=remarks)
         return {"message": f"Set employee {employee_no} remarks."}
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+REPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+def report_headers(format: str) -> dict[str, str]:
+    return {"Content-Disposition": f"attachment; filename=export.{format}"}
+
+def render_csv_chunk(resignees: Sequence[Resignee], pii: Sequence[Mapping[str, Any]], write_header: bool) -> str:
+    buffer = StringIO()
+    generate_csv_report(buffer, build_report_data(resignees, pii), write_header)
+    return buffer.getvalue()
+
+def write_xlsx_chunk(writer: XlsxReportWriter, resignees: Sequence[Resignee], pii: Sequence[Mapping[str, Any]]) -> None:
+    writer.write_rows(build_report_data(resignees, pii))
+
+async def timed_partitions(
+    session: AsyncSession,
+    statement: SelectOfScalar[Resignee],
+    timer: PhaseTimer
+) -> AsyncIterator[Sequence[Resignee]]:
+    """Stream the statement REPORT_BATCH_SIZE rows at a time, timing the fetches as the query phase."""
+    with timer.phase("query"):
+        result = await session.stream_scalars(statement.execution_options(yield_per=REPORT_BATCH_SIZE))
+    partitions = result.partitions()
+    while True:
+        with timer.phase("query"):
+            partition = await anext(partitions, None)
+        if partition is None:
+            return
+        yield partition
+
+async def stream_csv_report(statement: SelectOfScalar[Resignee], entry: EngineEntry) -> AsyncIterator[str]:
+    """
+    Yield the CSV report one database batch at a time, so memory stays
+    bounded by REPORT_BATCH_SIZE and the first rows go out while the
+    query is still running.
+    """
+    timer = PhaseTimer()
+    # Own session (on the request's database): the request-scoped one is not
+    # guaranteed to outlive the handler
+    async with leased_session(entry) as session:
+        write_header = True
+        async for partition in timed_partitions(session, statement, timer):
+            with timer.phase("decrypt"):
+                pii = await decrypt_resignees(partition)
+            with timer.phase("render"):
+                chunk = await run_in_threadpool(render_csv_chunk, partition, pii, write_header)
+            yield chunk
+            write_header = False
+    metrics.observe_report("csv", timer.phases)
+
+async def cache_report_stream(
+    chunks: AsyncIterator[str],
+    key: tuple[str, date, date, str],
+    file_state: tuple[int, ...],
+    generation: int
+) -> AsyncIterator[bytes]:
+    """Pass a streamed report through, storing it in report_cache once it completes."""
+    parts: list[bytes] | None = []
+    size = 0
+    async for chunk in chunks:
+        data = chunk.encode("utf-8")
+        if parts is not None:
+            parts.append(data)
+            size += len(data)
+            # Too big to cache; stop holding on to it
+            if size > report_cache.max_entry_bytes:
+                parts = None
+        yield data
+    if parts is not None:
+        report_cache.put(key, b"".join(parts), file_state, generation)
+
+def cache_report_file(
+    path: str,
+    key: tuple[str, date, date, str],
+    file_state: tuple[int, ...],
+    generation: int
+) -> None:
+    """After a report file has been sent: store it in report_cache if small enough, then remove it."""
+    try:
+        if os.path.getsize(path) <= report_cache.max_entry_bytes:
+            with open(path, "rb") as f:
+                report_cache.put(key, f.read(), file_state, generation)
+    finally:
+        os.remove(path)
+
 @router.get("/report")
 async def get_report(
     start_date: str, 
     end_date: str, 
     format: str = Query(default="csv", regex="^(csv|xlsx)$"),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """
     Generate an CSV or XLSX report of processed resignees within a selected timeframe.
@@ -395,82 +874,484 @@ async def get_report(
         end = datetime.fromisoformat(end_date).date()
         start = datetime.fromisoformat(start_date).date()
 
+        # Month-end reports get downloaded over and over; until a write touches
+        # their range, a repeat is served from memory
+        entry = session.info["engine_entry"]
+        cache_key = (entry.path, start, end, format)
+        file_state = get_file_state(entry.path)
+        cached = report_cache.get(cache_key, file_state)
+        if cached is not None:
+            return Response(cached, media_type=REPORT_MEDIA_TYPES[format], headers=report_headers(format))
+        generation = report_cache.generation
+
         statement = (
             select(Resignee)
             .where(Resignee.last_day >= start)
             .where(Resignee.last_day <= end)
         )
 
-        resignees = session.exec(statement).all()
+        # Cheap indexed probe so an empty range still gets a 404 before streaming starts
+        has_rows = (await session.exec(
+            select(Resignee.employee_no)
+            .where(Resignee.last_day >= start)
+            .where(Resignee.last_day <= end)
+            .limit(1)
+        )).first()
 
-        if not resignees:
+        if has_rows is None:
             raise HTTPException(status_code=404, detail="There were no resignees processed within the given period")
-        
-
-        report_data: list[Any] = []
-        for r in resignees:
-            report_data.append({
-                "Employee no.": r.employee_no,
-                "Last Name": r.last_name,
-                "First Name": r.first_name,
-                "Middle Name": r.middle_name,
-                "Cost center": r.cost_center,
-                "Position Title": r.position_title,
-                "Rank": r.rank,
-                "Department": r.department,
-                "Date hired": r.date_hired.strftime("%Y-%m-%d"),
-                "Last day with AUB": r.last_day,
-                "Date HR Emailed": r.date_hr_emailed,
-                "Batch Deactivation from UM": r.um_date_deac if r.um_date_deac else "",
-                "3rd party systems/apps": r.tp_date_deac if r.tp_date_deac else "",
-                "E-mails": r.email_date_deac if r.email_date_deac else "",
-                "Windows": r.windows_date_deac if r.windows_date_deac else "",
-                "Remarks": r.remarks or "",
-                "Status": Status.PROCESSED if r.processed_date_time else Status.UNPROCESSED,
-                "Processed on": r.processed_date_time.strftime("%B %d, %Y %I:%M %p") if r.processed_date_time else "",
-            })
-
 
         if format == "csv":
-            csv_file = StringIO()
-            generate_csv_report(csv_file, report_data)
-            return Response(
-                content=csv_file.getvalue(),
-                media_type="text/csv",
-                headers={"Content-Disposition": "attachment; filename=export.csv"},
+            return StreamingResponse(
+                cache_report_stream(stream_csv_report(statement, entry), cache_key, file_state, generation),
+                media_type=REPORT_MEDIA_TYPES["csv"],
+                headers=report_headers("csv"),
             )
 
-        elif format == "xlsx":
-            excel_file = BytesIO()
-            generate_xls_report(excel_file, report_data)
-            excel_file.seek(0)
-            return Response(
-                content=excel_file.read(),
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={"Content-Disposition": "attachment; filename=export.xlsx"},
-            )
+        # Rows are written to a temp file in constant-memory mode, one database
+        # batch at a time, and the finished file is streamed back
+        fd, xlsx_path = tempfile.mkstemp(prefix="report-", suffix=".xlsx")
+        os.close(fd)
+        timer = PhaseTimer()
+        try:
+            with timer.phase("render"):
+                writer = await run_in_threadpool(XlsxReportWriter, xlsx_path)
+            async for partition in timed_partitions(session, statement, timer):
+                with timer.phase("decrypt"):
+                    pii = await decrypt_resignees(partition)
+                with timer.phase("render"):
+                    await run_in_threadpool(write_xlsx_chunk, writer, partition, pii)
+            with timer.phase("render"):
+                await run_in_threadpool(writer.close)
+        except BaseException:
+            os.remove(xlsx_path)
+            raise
+        metrics.observe_report("xlsx", timer.phases)
+
+        # Streamed from disk; the cache is filled from the file once it is sent
+        return FileResponse(
+            xlsx_path,
+            media_type=REPORT_MEDIA_TYPES["xlsx"],
+            filename="export.xlsx",
+            background=BackgroundTask(cache_report_file, xlsx_path, cache_key, file_state, generation),
+        )
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+def report_job_info(job: ReportJob) -> ReportJobInfo:
+    expires_at = report_jobs.expires_at(job)
+    return ReportJobInfo(
+        id=job.id,
+        status=job.status,
+        format=job.format,
+        start_date=job.start.isoformat(),
+        end_date=job.end.isoformat(),
+        rows_total=job.rows_total,
+        rows_written=job.rows_written,
+        error=job.error,
+        expires_at=expires_at.isoformat(timespec="seconds") if expires_at else None,
+        download_url=router.url_path_for("download_report_job", job_id=job.id) if job.status == ReportJobStatus.DONE else None,
+    )
+
+# Large exports: queue the report, poll it, then download the file
+@router.post("/report-jobs", response_model=ReportJobInfo, status_code=202)
+async def submit_report_job(
+    body: ReportJobRequest = Body(...),
+    session: AsyncSession = Depends(get_session)
+):
+    try:
+        start = datetime.fromisoformat(body.start_date).date()
+        end = datetime.fromisoformat(body.end_date).date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+
+    if report_jobs.active_count >= report_jobs.max_active:
+        raise HTTPException(status_code=429, detail="Too many report jobs in progress. Try again once one finishes.")
+
+    try:
+        rows_total = (await session.exec(
+            select(func.count()).select_from(Resignee).where(Resignee.last_day >= start, Resignee.last_day <= end)
+        )).one()
+        if rows_total == 0:
+            raise HTTPException(status_code=404, detail="There were no resignees processed within the given period")
+
+        job = report_jobs.submit(session.info["engine_entry"].path, start, end, body.format, rows_total)
+        return report_job_info(job)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/report-jobs/{job_id}", response_model=ReportJobInfo)
+async def get_report_job(job_id: str = Path(...)):
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found or expired")
+    return report_job_info(job)
+
+@router.get("/report-jobs/{job_id}/download")
+async def download_report_job(job_id: str = Path(...)):
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found or expired")
+    if job.status != ReportJobStatus.DONE:
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status}")
+    # Kept until the job expires, so the download can be retried
+    return FileResponse(job.path, media_type=REPORT_MEDIA_TYPES[job.format], filename=f"export.{job.format}")
+
+# resignee_monthly_stats column prefix per account (the late flag's, minus "_late")
+STATS_ACCOUNT_PREFIXES = {
+    account: late_attribute.removesuffix("_late") for account, (_, late_attribute) in ACCOUNT_DATE_ATTRIBUTES.items()
+}
+
+def split_months(start: date, end: date) -> tuple[tuple[str, str] | None, list[tuple[date, date]]]:
+    """
+    The whole months within [start, end] as a (first, last) YYYY-MM pair,
+    read from the rollup tables, and the partial months at either end,
+    which have to be counted from resignee rows.
+    """
+    first_whole = start if start.day == 1 else (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+    last_whole = (end + timedelta(days=1)).replace(day=1) - timedelta(days=1)
+    if first_whole > last_whole:
+        return None, [(start, end)]
+    edges = []
+    if start < first_whole:
+        edges.append((start, first_whole - timedelta(days=1)))
+    if last_whole < end:
+        edges.append((last_whole + timedelta(days=1), end))
+    return (first_whole.strftime("%Y-%m"), last_whole.strftime("%Y-%m")), edges
+
+def in_date_ranges(ranges: list[tuple[date, date]]) -> Any:
+    return or_(*(and_(Resignee.last_day >= first, Resignee.last_day <= last) for first, last in ranges))
+
+def stats_cells(whole_months: tuple[str, str] | None, edges: list[tuple[date, date]]) -> Any:
+    """CTE of (month, department) rows of resignee_monthly_stats columns covering the range."""
+    stats = ResigneeMonthlyStats
+    count_columns = [column.name for column in stats.__table__.columns if column.name not in ("month", "department")]
+    parts = []
+    if whole_months:
+        parts.append(
+            select(stats.month, stats.department, *(getattr(stats, name) for name in count_columns))
+            .where(stats.month >= whole_months[0], stats.month <= whole_months[1])
+        )
+    if edges:
+        # Same counts as the triggers keep; the persisted late flags follow is_late()
+        counts = {"resignees": func.count()}
+        for account, (date_attribute, late_attribute) in ACCOUNT_DATE_ATTRIBUTES.items():
+            deac = getattr(Resignee, date_attribute)
+            prefix = STATS_ACCOUNT_PREFIXES[account]
+            counts[f"{prefix}_deactivated"] = func.count(case((~is_no_account(deac), 1)))
+            counts[f"{prefix}_late"] = func.count(case((getattr(Resignee, late_attribute), 1)))
+            counts[f"{prefix}_pending"] = func.count(case((deac.is_(None), 1)))
+            counts[f"{prefix}_no_account"] = func.count(case((is_no_account(deac), 1)))
+        month = func.substr(Resignee.last_day, 1, 7)
+        parts.append(
+            select(month.label("month"), Resignee.department, *(counts[name].label(name) for name in count_columns))
+            .where(in_date_ranges(edges))
+            .group_by(month, Resignee.department)
+        )
+    return union_all(*parts).cte("cells")
+
+def deactivation_days_cells(whole_months: tuple[str, str] | None, edges: list[tuple[date, date]]) -> Any:
+    """(account, days, resignees) rows of the days-to-deactivation histogram covering the range."""
+    histogram = ResigneeDeactivationDays
+    parts = []
+    if whole_months:
+        parts.append(
+            select(histogram.account, histogram.days, histogram.resignees)
+            .where(histogram.month >= whole_months[0], histogram.month <= whole_months[1])
+        )
+    if edges:
+        for account, (date_attribute, _) in ACCOUNT_DATE_ATTRIBUTES.items():
+            deac = getattr(Resignee, date_attribute)
+            days = cast(func.julianday(deac) - func.julianday(Resignee.last_day), Integer)
+            parts.append(
+                select(literal(STATS_ACCOUNT_PREFIXES[account]).label("account"), days.label("days"), func.count().label("resignees"))
+                .where(in_date_ranges(edges), ~is_no_account(deac))
+                .group_by(days)
+            )
+    return union_all(*parts).subquery("cells")
+
+def median_days_statement(cells: Any) -> Any:
+    """Median days to deactivation per account, from the histogram's running totals."""
+    counts = (
+        select(cells.c.account, cells.c.days, func.sum(cells.c.resignees).label("resignees"))
+        .group_by(cells.c.account, cells.c.days)
+        .subquery()
+    )
+    ranked = select(
+        counts.c.account,
+        counts.c.days,
+        func.sum(counts.c.resignees).over(partition_by=counts.c.account, order_by=counts.c.days).label("running"),
+        func.sum(counts.c.resignees).over(partition_by=counts.c.account).label("total"),
+    ).subquery()
+    # The middle value, or the two middle values averaged for an even count
+    lower = func.min(case((ranked.c.running >= (ranked.c.total + 1) // 2, ranked.c.days)))
+    upper = func.min(case((ranked.c.running >= ranked.c.total // 2 + 1, ranked.c.days)))
+    return select(ranked.c.account, (lower + upper) / 2.0).where(ranked.c.total > 0).group_by(ranked.c.account)
+
+def late_rate(late: int, deactivated: int) -> float | None:
+    return round(late / deactivated, 4) if deactivated else None
+
+def lateness_group(row: Any) -> LatenessGroup:
+    counts = row._mapping
+    deactivated = {account: counts[f"{prefix}_deactivated"] for account, prefix in STATS_ACCOUNT_PREFIXES.items()}
+    late = {account: counts[f"{prefix}_late"] for account, prefix in STATS_ACCOUNT_PREFIXES.items()}
+    return LatenessGroup(
+        key=row.key,
+        resignees=row.resignees,
+        deactivated=deactivated,
+        late=late,
+        late_rate={account: late_rate(late[account], deactivated[account]) for account in STATS_ACCOUNT_PREFIXES},
+    )
+
+@router.get("/stats", response_model=LatenessStats)
+async def get_lateness_stats(
+    start_date: str,
+    end_date: str,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Late deactivation counts and rates per account type, overall, per
+    department and per month of last day, for resignees whose last day is
+    within the range, plus the median days from last day to deactivation.
+    """
+    try:
+        start = datetime.fromisoformat(start_date).date()
+        end = datetime.fromisoformat(end_date).date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+    if start > end:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+
+    try:
+        whole_months, edges = split_months(start, end)
+        cells = stats_cells(whole_months, edges)
+        count_columns = [column.name for column in cells.columns if column.name not in ("month", "department")]
+        sums = [func.coalesce(func.sum(cells.c[name]), 0).label(name) for name in count_columns]
+        # One statement, so SQLite materializes the cells (and scans any partial months) once
+        groupings = union_all(
+            select(literal("total").label("grouping"), literal("").label("key"), *sums),
+            select(literal("department"), cells.c.department, *sums)
+            .group_by(cells.c.department)
+            .having(func.sum(cells.c.resignees) > 0),
+            select(literal("month"), cells.c.month, *sums)
+            .group_by(cells.c.month)
+            .having(func.sum(cells.c.resignees) > 0),
+        )
+        groups: dict[str, list[Any]] = {"total": [], "department": [], "month": []}
+        for row in (await session.exec(groupings.order_by(groupings.selected_columns.key))).all():
+            groups[row.grouping].append(row)
+        totals = groups["total"][0]
+        medians = dict((await session.exec(median_days_statement(deactivation_days_cells(whole_months, edges)))).all())
+
+        counts = totals._mapping
+        accounts = {}
+        for account, prefix in STATS_ACCOUNT_PREFIXES.items():
+            median = medians.get(prefix)
+            accounts[account] = AccountLateness(
+                deactivated=counts[f"{prefix}_deactivated"],
+                late=counts[f"{prefix}_late"],
+                late_rate=late_rate(counts[f"{prefix}_late"], counts[f"{prefix}_deactivated"]),
+                pending=counts[f"{prefix}_pending"],
+                no_account=counts[f"{prefix}_no_account"],
+                median_days_to_deactivation=None if median is None else round(median, 1),
+            )
+
+        return LatenessStats(
+            start_date=start.isoformat(),
+            end_date=end.isoformat(),
+            resignees=totals.resignees,
+            accounts=accounts,
+            by_department=[lateness_group(row) for row in groups["department"]],
+            by_month=[lateness_group(row) for row in groups["month"]],
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+MAX_SEARCH_TERMS = 8
+# A shorter last word matches whole tokens only; prefix='2 3' on the index
+# covers the short prefixes that would otherwise merge thousands of terms
+MIN_PREFIX_LENGTH = 2
+# Only the newest matches, by search_id (insertion order), are ranked: bm25 over
+# every row a one- or two-letter prefix matches would cost seconds at a
+# million rows
+SEARCH_RANK_WINDOW = 2000
+SEARCH_TERM = re.compile(r"\w+")
+# The index's rowid is resignee.search_id
+resignee_search = table("resignee_search", column("rowid"), column("rank"))
+
+def search_match_query(q: str) -> str | None:
+    """
+    FTS5 query for rows containing every word of `q`, the last one as a
+    prefix (the word still being typed); None if `q` has no words. Earlier
+    words match whole tokens: FTS5 loads a prefix term's full doclist, so
+    a prefix on each word would cost time in proportion to the table.
+    """
+    terms = SEARCH_TERM.findall(q)[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    # Quoted so words like AND, OR or NEAR are never parsed as operators
+    query = " ".join(f'"{term}"' for term in terms)
+    return query + "*" if len(terms[-1]) >= MIN_PREFIX_LENGTH else query
+
+@router.get("/search", response_model=list[ResigneeDisplay])
+async def search_resignees(
+    q: str = Query(..., min_length=1, description="Words to look for; the last one matches as a prefix"),
+    limit: int = Query(default=50, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Resignees, processed or not, whose name, position title, department or
+    remarks contain every word of `q`, the last word matching as a prefix.
+    Best match first among the newest SEARCH_RANK_WINDOW matches. With
+    ENCRYPT_PII on, names and remarks are not indexed and only position
+    title and department are searched.
+    """
+    match_query = search_match_query(q)
+    if match_query is None:
+        raise HTTPException(status_code=400, detail="Search text must contain a letter or digit")
+
+    try:
+        is_match = literal_column("resignee_search").op("MATCH")(match_query)
+        newest = (
+            select(resignee_search.c.rowid)
+            .where(is_match)
+            .order_by(desc(resignee_search.c.rowid))
+            .limit(SEARCH_RANK_WINDOW)
+            .subquery()
+        )
+        # A rowid bound FTS5 applies before ranking, unlike IN (...)
+        window_start = select(func.coalesce(func.min(newest.c.rowid), 0)).scalar_subquery()
+        matches = (
+            select(resignee_search.c.rowid, resignee_search.c.rank)
+            .where(is_match, resignee_search.c.rowid >= window_start)
+            .order_by(resignee_search.c.rank)
+            .limit(limit)
+            .subquery()
+        )
+        statement = (
+            select(Resignee)
+            .join(matches, Resignee.search_id == matches.c.rowid)
+            .order_by(matches.c.rank)
+        )
+        results = (await session.exec(statement)).all()
+        return [to_resignee_display(entry, pii) for entry, pii in zip(results, await decrypt_resignees(results))]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Endpoint to mark resignation entry as processed (will now not be returned to client )
+async def set_processed_date_time(
+    session: AsyncSession,
+    selection: BulkProcessRequest,
+    processed_date_time: datetime | None
+) -> tuple[list[str], list[date]]:
+    """
+    Set processed_date_time on the selected rows that are not already in the
+    target state, with one UPDATE ... RETURNING per chunk of employee numbers
+    (or a single one for a filter). Returns the plaintext employee numbers
+    and the affected rows' last days.
+    """
+    if (selection.employee_nos is None) == (selection.filter is None):
+        raise HTTPException(status_code=400, detail="Provide either employee_nos or filter.")
+
+    if processed_date_time is not None:
+        state = Resignee.processed_date_time == None
+    else:
+        state = Resignee.processed_date_time != None
+
+    statements = []
+    if selection.employee_nos is not None:
+        if len(selection.employee_nos) > MAX_BULK_UPDATES:
+            raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_UPDATES} employees per request.")
+        employee_nos = list(dict.fromkeys(selection.employee_nos))
+        for i in range(0, len(employee_nos), INGEST_BATCH_SIZE):
+            chunk = employee_nos[i:i + INGEST_BATCH_SIZE]
+            if encryption_enabled():
+                selected = col(Resignee.employee_no_hash).in_([hash_employee_no(no) for no in chunk])
+            else:
+                selected = col(Resignee.employee_no).in_(chunk)
+            statements.append(update(Resignee).where(state, selected))
+    else:
+        filters = resignee_filters(selection.filter)
+        # An empty filter would select every row in the target state
+        if not filters:
+            raise HTTPException(status_code=400, detail="filter must set at least one criterion.")
+        statements.append(update(Resignee).where(state, *filters))
+
+    affected: list[str] = []
+    last_days: list[date] = []
+    for statement in statements:
+        statement = statement.values(processed_date_time=processed_date_time).returning(Resignee.employee_no, Resignee.last_day)
+        for employee_no, last_day in (await session.exec(statement)).all():
+            affected.append(employee_no)
+            last_days.append(last_day)
+
+    if encryption_enabled():
+        affected = await decrypt_in_pool(affected)
+    return affected, last_days
+
+# Endpoint marking many resignees processed at once, by list or by filter
+@router.put("/process", response_model=BulkProcessResult)
+async def mark_resignees_processed(
+    selection: BulkProcessRequest = Body(...),
+    session: AsyncSession = Depends(get_session)
+):
+    try:
+        now = datetime.now()
+        employee_nos, last_days = await set_processed_date_time(session, selection, now)
+        await session.commit()
+        if employee_nos:
+            publish_change("bulk_processed", last_days=last_days, employee_nos=employee_nos, processed_date_time=now.strftime("%Y-%m-%d %H:%M:%S"))
+
+        return BulkProcessResult(employee_nos=employee_nos, processed_date_time=now.isoformat())
+
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/unprocess", response_model=BulkProcessResult)
+async def unmark_resignees_processed(
+    selection: BulkProcessRequest = Body(...),
+    session: AsyncSession = Depends(get_session)
+):
+    try:
+        employee_nos, last_days = await set_processed_date_time(session, selection, None)
+        await session.commit()
+        if employee_nos:
+            publish_change("bulk_unprocessed", last_days=last_days, employee_nos=employee_nos)
+
+        return BulkProcessResult(employee_nos=employee_nos, processed_date_time=None)
+
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/{employee_no}/process")
 async def mark_resignee_processed(
     employee_no: str = Path(...),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     try:
         now = datetime.now()
-        statement = select(Resignee).where(Resignee.employee_no == employee_no)
-        resignee = session.exec(statement).first()
+        statement = select(Resignee).where(employee_no_matches(employee_no))
+        resignee = (await session.exec(statement)).first()
 
         if not resignee:
             raise HTTPException(status_code=404, detail="Employee not found")
 
         resignee.processed_date_time = now
-        session.commit()
+        await session.commit()
+        publish_change("processed", employee_no, last_days=[resignee.last_day], processed_date_time=now.strftime("%Y-%m-%d %H:%M:%S"))
 
         return {
             "message": f"Employee {employee_no} marked as processed.",
@@ -484,21 +1365,22 @@ async def mark_resignee_processed(
 @router.put("/{employee_no}/unprocess")
 async def unmark_resignee_processed(
     employee_no: str = Path(..., description="Employee number to unmark as processed"),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """
     Unmark a resignee as processed by setting processed_date_time to None.
     """
     try:
 
-        statement = select(Resignee).where(Resignee.employee_no == employee_no)
-        resignee = session.exec(statement).first()
+        statement = select(Resignee).where(employee_no_matches(employee_no))
+        resignee = (await session.exec(statement)).first()
 
         if not resignee:
             raise HTTPException(status_code=404, detail="Employee not found")
 
         resignee.processed_date_time = None
-        session.commit()
+        await session.commit()
+        publish_change("unprocessed", employee_no, last_days=[resignee.last_day])
 
         return {"message": f"Employee {employee_no} unmarked as processed."}
 
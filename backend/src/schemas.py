@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from enum import Enum, StrEnum
+from typing import Literal
 
 class ResigneeDisplay(BaseModel):
     employee_no: str
@@ -34,11 +35,107 @@ class ResigneeCreate(BaseModel):
     department: str 
     last_day: str
 
+class RejectedResignee(BaseModel):
+    employee_no: str
+    reason: str
+
+class ResigneeParseError(BaseModel):
+    line: int
+    employee_no: str | None
+    field: str
+    message: str
+
+class ResigneeIngestResult(BaseModel):
+    added: list[ResigneeDisplay]
+    rejected: list[RejectedResignee]
+    errors: list[ResigneeParseError]
+
 class EditDate(BaseModel):
     message: str
     date: str
     late: bool
     
+class PendingAccount(StrEnum):
+    UM = "um"
+    THIRD_PARTY = "third_party"
+    EMAIL = "email"
+    WINDOWS = "windows"
+
+class DeactivationDateUpdate(BaseModel):
+    employee_no: str
+    account: PendingAccount
+    date: str
+
+class DeactivationDateResult(BaseModel):
+    employee_no: str
+    account: PendingAccount
+    date: str
+    late: bool
+
+class ResigneeFilter(BaseModel):
+    department: str | None = None
+    cost_center: str | None = None
+    late_only: bool = False
+    pending: PendingAccount | None = None
+    all_deactivated: bool = False
+
+class BulkProcessRequest(BaseModel):
+    employee_nos: list[str] | None = None
+    filter: ResigneeFilter | None = None
+
+class BulkProcessResult(BaseModel):
+    employee_nos: list[str]
+    processed_date_time: str | None
+
+class AccountLateness(BaseModel):
+    # Deactivated accounts, excluding "No Existing Account"
+    deactivated: int
+    late: int
+    late_rate: float | None
+    # No deactivation date yet
+    pending: int
+    no_account: int
+    median_days_to_deactivation: float | None
+
+class LatenessGroup(BaseModel):
+    key: str
+    resignees: int
+    deactivated: dict[PendingAccount, int]
+    late: dict[PendingAccount, int]
+    late_rate: dict[PendingAccount, float | None]
+
+class LatenessStats(BaseModel):
+    start_date: str
+    end_date: str
+    resignees: int
+    accounts: dict[PendingAccount, AccountLateness]
+    by_department: list[LatenessGroup]
+    by_month: list[LatenessGroup]
+
+class ReportJobRequest(BaseModel):
+    start_date: str
+    end_date: str
+    format: Literal["csv", "xlsx"] = "xlsx"
+
+class ReportJobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class ReportJobInfo(BaseModel):
+    id: str
+    status: ReportJobStatus
+    format: str
+    start_date: str
+    end_date: str
+    rows_total: int
+    rows_written: int
+    error: str | None = None
+    # Set once done; the file is deleted after this
+    expires_at: str | None = None
+    download_url: str | None = None
+
 class Account(Enum):
     UM = 1
     TP = 2
@@ -47,4 +144,4 @@ class Account(Enum):
 
 class Status(StrEnum):
     PROCESSED = "PROCESSED"
-    UNPROCESSED = "UNPROCESSED"
\ No newline at end of file
+    UNPROCESSED = "UNPROCESSED"
@@ -1,145 +1,453 @@
 # place parsing functions and other business logic here
 
 # Parsing function (from raw text from email to labeled data)
-from src.schemas import ResigneeCreate, Account, Status
-from io import StringIO, BytesIO
+from src.schemas import ResigneeCreate, ResigneeParseError, Account, Status
+from src.models import Resignee
+from io import BytesIO
 import csv
-from typing import Sequence, Mapping, Any
+from typing import Sequence, Mapping, Any, Callable, Iterable, Iterator, TextIO
+from dataclasses import dataclass
+from collections import deque, OrderedDict
+import bisect
+import logging
+import time
+import re
 import jwt
 import os
-import xlsxwriter
 from datetime import datetime, timedelta, date
 
+logger = logging.getLogger(__name__)
+
 headers = [
     "Employee no.", "Date hired", "Cost center", "Last Name", "First Name", "Middle Name",
     "Position Title", "Rank", "Department", "Last day with AUB", "Date HR Emailed", "Batch Deactivation from UM", "3rd party systems/apps", "E-mails", "Windows", "Remarks", "Status", "Processed on"
 ]
 
-def parse_resignee_text(raw_text: str) -> list[ResigneeCreate]:
+# Field order of one resignee block in the HR email
+RESIGNEE_FIELDS = (
+    "employee_no", "date_hired", "cost_center", "last_name", "first_name",
+    "middle_name", "position_title", "rank", "department", "last_day",
+)
+DATE_FIELDS = {1: "date_hired", 9: "last_day"}
+
+EMPLOYEE_NO_PATTERN = re.compile(r"^(?=.*\d)[A-Za-z0-9-]+$")
+DATE_PATTERN = re.compile(r"^\d{1,2}/\d{1,2}/\d{4}$")
+
+class ResigneeTextParser:
     """
-    Parses raw text input (fields separated by newlines, possibly with blank lines)
-    and returns a list of ResigneeCreate objects.
-    """
-    employees = []
-    # Get all non-empty lines
-    lines = [line.strip() for line in raw_text.strip().split('\n') if line.strip()]
-    # Group every 10 lines as one employee
-    for i in range(0, len(lines), 10):
-        chunk = lines[i:i+10]
-        if len(chunk) < 10:
-            continue
-        try:
-            employee = ResigneeCreate(
-                employee_no=chunk[0],
-                date_hired=chunk[1],
-                cost_center=chunk[2],
-                last_name=chunk[3],
-                first_name=chunk[4],
-                middle_name=chunk[5],
-                position_title=chunk[6],
-                rank=chunk[7],
-                department=chunk[8],
-                last_day=chunk[9]
+    Incremental parser for pasted resignee details.
+
+    Text is fed in arbitrary chunks; only the current (at most 10 line)
+    record is held in memory. The employee number and the two MM/DD/YYYY
+    dates anchor each record, so when a record is missing or has extra
+    lines the parser reports it and resynchronizes on the next
+    employee-number/date pair instead of shifting every later record.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._line_no = 0
+        self._fields: list[tuple[int, str]] = []
+        # True while skipping lines after an error, so one bad region yields one error
+        self._recovering = False
+
+    def feed(self, chunk: str) -> Iterator[ResigneeCreate | ResigneeParseError]:
+        lines = (self._pending + chunk).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._line_no += 1
+            yield from self._feed_line(self._line_no, line)
+
+    def close(self) -> Iterator[ResigneeCreate | ResigneeParseError]:
+        if self._pending:
+            self._line_no += 1
+            yield from self._feed_line(self._line_no, self._pending)
+            self._pending = ""
+        if self._fields:
+            line_no, employee_no = self._fields[0]
+            yield ResigneeParseError(
+                line=line_no,
+                employee_no=employee_no,
+                field=RESIGNEE_FIELDS[len(self._fields)],
+                message="Incomplete record at end of text",
             )
-            employees.append(employee)
-        except Exception:
-            continue
-    return employees
+            self._fields = []
+
+    def _feed_line(self, line_no: int, raw_line: str) -> Iterator[ResigneeCreate | ResigneeParseError]:
+        # Lines queued for (re)parsing; a failed record's lines are replayed
+        # from its second line so a following record caught inside it is kept
+        queue: deque[tuple[int, str]] = deque([(line_no, raw_line.strip())])
+        while queue:
+            line_no, line = queue.popleft()
+            if not line:
+                continue
+
+            position = len(self._fields)
+
+            if position == 0:
+                if EMPLOYEE_NO_PATTERN.match(line):
+                    self._fields.append((line_no, line))
+                elif not self._recovering:
+                    self._recovering = True
+                    yield ResigneeParseError(
+                        line=line_no,
+                        employee_no=None,
+                        field="employee_no",
+                        message=f"Expected an employee number, got {line!r}",
+                    )
+                continue
+
+            is_date = DATE_PATTERN.match(line) is not None
+            if (position in DATE_FIELDS) == is_date:
+                self._fields.append((line_no, line))
+                if len(self._fields) == len(RESIGNEE_FIELDS):
+                    values = {name: value for name, (_, value) in zip(RESIGNEE_FIELDS, self._fields)}
+                    self._fields = []
+                    self._recovering = False
+                    yield ResigneeCreate(**values)
+                continue
+
+            field = RESIGNEE_FIELDS[position]
+            expected = "an MM/DD/YYYY date" if position in DATE_FIELDS else "text (record looks short)"
+            employee_no = self._fields[0][1]
+            if not self._recovering:
+                yield ResigneeParseError(
+                    line=line_no,
+                    employee_no=employee_no,
+                    field=field,
+                    message=f"Expected {expected} for {field}, got {line!r}",
+                )
+            self._recovering = True
+            queue.extendleft(reversed(self._fields[1:] + [(line_no, line)]))
+            self._fields = []
+
+def parse_resignee_text(text: str | Iterable[str]) -> Iterator[ResigneeCreate | ResigneeParseError]:
+    """
+    Parses raw text input (fields separated by newlines, possibly with blank lines)
+    and yields a ResigneeCreate per record or a ResigneeParseError per malformed region.
+    Accepts the whole text or an iterable of text chunks.
+    """
+    parser = ResigneeTextParser()
+    chunks = [text] if isinstance(text, str) else text
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
 
-def generate_csv_report(buffer: StringIO, data: Sequence[Mapping[str, Any]]) -> None:
+def build_report_data(resignees: Sequence[Resignee], pii: Sequence[Mapping[str, Any]]) -> list[Any]:
+    report_data: list[Any] = []
+    for r, p in zip(resignees, pii):
+        report_data.append({
+            "Employee no.": p["employee_no"],
+            "Last Name": p["last_name"],
+            "First Name": p["first_name"],
+            "Middle Name": p["middle_name"],
+            "Cost center": r.cost_center,
+            "Position Title": r.position_title,
+            "Rank": r.rank,
+            "Department": r.department,
+            "Date hired": r.date_hired.strftime("%Y-%m-%d"),
+            "Last day with AUB": r.last_day,
+            "Date HR Emailed": r.date_hr_emailed,
+            "Batch Deactivation from UM": r.um_date_deac if r.um_date_deac else "",
+            "3rd party systems/apps": r.tp_date_deac if r.tp_date_deac else "",
+            "E-mails": r.email_date_deac if r.email_date_deac else "",
+            "Windows": r.windows_date_deac if r.windows_date_deac else "",
+            "Remarks": p["remarks"] or "",
+            "Status": Status.PROCESSED if r.processed_date_time else Status.UNPROCESSED,
+            "Processed on": r.processed_date_time.strftime("%B %d, %Y %I:%M %p") if r.processed_date_time else "",
+            "um_late": r.um_late,
+            "tp_late": r.tp_late,
+            "email_late": r.email_late,
+            "windows_late": r.windows_late,
+        })
+    return report_data
 
-    writer = csv.DictWriter(buffer, fieldnames=headers)
-    writer.writeheader()
+def generate_csv_report(buffer: TextIO, data: Sequence[Mapping[str, Any]], write_header: bool = True) -> None:
+
+    # Rows may carry extra keys (e.g. persisted late flags) that are not CSV columns
+    writer = csv.DictWriter(buffer, fieldnames=headers, extrasaction="ignore")
+    if write_header:
+        writer.writeheader()
     writer.writerows(data)
 
-def generate_xls_report(file: BytesIO, data: Sequence[Mapping[str, Any]]) -> None:
-    workbook = xlsxwriter.Workbook(file)
-    worksheet = workbook.add_worksheet()
+class XlsxReportWriter:
+    """
+    Writes report rows to an .xlsx file in order, in xlsxwriter's
+    constant_memory mode: each row is flushed to disk as soon as the next
+    one starts, so memory does not grow with the report. Column widths are
+    tracked as rows are written instead of using autofit(), which needs
+    every cell kept in memory.
+    """
+
+    def __init__(self, file: str | BytesIO):
+        # Imported on first export rather than at startup
+        import xlsxwriter
 
-    header_format = workbook.add_format({'bold': True})
-    late_format = workbook.add_format({'bg_color': "#F9808E"})
-    processed_format = workbook.add_format({'bg_color': "#2BFF00", 'bold': True})
-    unprocessed_format = workbook.add_format({'bg_color': "#FF5500", 'bold': True})
+        self.workbook = xlsxwriter.Workbook(file, {'constant_memory': True})
+        self.worksheet = self.workbook.add_worksheet()
 
-    worksheet.write_row(0, 0, headers, header_format)
+        self.header_format = self.workbook.add_format({'bold': True})
+        self.late_format = self.workbook.add_format({'bg_color': "#F9808E"})
+        self.processed_format = self.workbook.add_format({'bg_color': "#2BFF00", 'bold': True})
+        self.unprocessed_format = self.workbook.add_format({'bg_color': "#FF5500", 'bold': True})
 
-    i = 1
-    try:
+        self.widths = [len(header) for header in headers]
+        self.rows_written = 0
+        self.worksheet.write_row(0, 0, headers, self.header_format)
+
+    def _write(self, row: int, col: int, value: str, cell_format: Any = None) -> None:
+        self.worksheet.write_string(row, col, value, cell_format)
+        if len(value) > self.widths[col]:
+            self.widths[col] = len(value)
+
+    def write_rows(self, data: Iterable[Mapping[str, Any]]) -> None:
         for entry in data:
-            
+            i = self.rows_written + 1
+
             last_day: date = entry['Last day with AUB']
             hr: datetime = entry['Date HR Emailed']
-            um: date = entry['Batch Deactivation from UM']
-            tp: date = entry['3rd party systems/apps']
-            em: date = entry['E-mails']
-            wn: date = entry['Windows']
+            deacs: list[tuple[date | None, Account]] = [
+                (entry['Batch Deactivation from UM'] or None, Account.UM),
+                (entry['3rd party systems/apps'] or None, Account.TP),
+                (entry['E-mails'] or None, Account.EM),
+                (entry['Windows'] or None, Account.WN),
+            ]
             processed = entry["Status"]
 
-            details: list[Any] = [entry['Employee no.'],
+            details: list[str] = [entry['Employee no.'],
             entry['Date hired'],
             entry['Cost center'],
             entry['Last Name'],
-            entry['First Name'], 
+            entry['First Name'],
             entry['Middle Name'],
             entry['Position Title'],
             entry['Rank'],
             entry['Department'],
             last_day.strftime("%Y-%m-%d"),
-            hr.date(),
-            um.strftime("%Y-%m-%d"),
-            tp.strftime("%Y-%m-%d"),
-            em.strftime("%Y-%m-%d"),
-            wn.strftime("%Y-%m-%d"),
-            entry['Remarks']]
-            worksheet.write_row(i, 0, details)
+            hr.strftime("%Y-%m-%d")]
+            for col, value in enumerate(details):
+                self._write(i, col, value)
 
             # Marking if late
-            for col, (deac, acc) in enumerate([(um, Account.UM), (tp, Account.TP), (em, Account.EM), (wn, Account.WN)], 11):
-                if decode_deactivation_date(deac) == "No Existing Account":
-                    worksheet.write(i, col, "No Existing Account")
-                    continue
-                if is_late(last_day, deac, hr, acc):
-                    worksheet.write(i, col, deac, late_format)
-            
-            # Marking if processed 
+            for col, (deac, acc) in enumerate(deacs, 11):
+                decoded = decode_deactivation_date(deac)
+                flag = LATE_FLAG_COLUMNS[acc][1]
+                if decoded == "No Existing Account":
+                    self._write(i, col, decoded)
+                elif entry[flag] if flag in entry else is_late(last_day, deac, hr, acc):
+                    self._write(i, col, decoded, self.late_format)
+                else:
+                    self._write(i, col, decoded)
+
+            self._write(i, 15, entry['Remarks'])
+
+            # Marking if processed
             if processed == Status.PROCESSED:
-                worksheet.write(i, 16, processed, processed_format)
-                worksheet.write(i, 17, entry["Processed on"])
+                self._write(i, 16, processed, self.processed_format)
+                self._write(i, 17, entry["Processed on"])
             else:
-                worksheet.write(i, 16, processed, unprocessed_format)
+                self._write(i, 16, processed, self.unprocessed_format)
 
-            i += 1
+            self.rows_written += 1
 
-    except Exception as e:
-        print(e)
+    def close(self) -> None:
+        for col, width in enumerate(self.widths):
+            self.worksheet.set_column(col, col, width + 2)
+        self.workbook.close()
 
-    worksheet.autofit()
-    workbook.close()
+def generate_xls_report(file: str | BytesIO, data: Iterable[Mapping[str, Any]]) -> None:
+    writer = XlsxReportWriter(file)
+    writer.write_rows(data)
+    writer.close()
 
-async def verify_token(token: str):
+_jwt_secret: str | None = None
+
+def load_jwt_secret() -> str:
+    """Read JWT_SECRET_KEY once; called at app startup."""
+    global _jwt_secret
     secret_key = os.getenv("JWT_SECRET_KEY")
     if not secret_key:
         raise ValueError("SECRET_KEY not found in environment variables")
-    
-    # print(jwt.decode(token, secret_key, "HS256"))
+    _jwt_secret = secret_key
+    return secret_key
+
+async def verify_token(token: str):
+    secret_key = _jwt_secret or load_jwt_secret()
+
     try:
         token_data = jwt.decode(token[7:], secret_key, algorithms=["HS256"]) # Remove "Bearer "
-        print(token_data)
+        logger.debug("Verified token for %s", token_data.get("sub"))
         return token_data
     except jwt.PyJWTError as e:
+        logger.debug("Rejected token: %s", e)
         return None
 
+class TokenCache:
+    """
+    Bounded LRU of tokens that already passed verify_token, keyed by the raw
+    cookie value. Entries are dropped once the token's `exp` has passed, so a
+    hit is exactly as valid as a fresh decode would be.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    def get(self, token: str) -> dict[str, Any] | None:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        exp, payload = entry
+        if exp <= time.time():
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return payload
+
+    def put(self, token: str, payload: dict[str, Any]) -> None:
+        exp = payload.get("exp")
+        # Tokens without an expiry never go stale on their own; don't pin them
+        if not isinstance(exp, (int, float)):
+            return
+        self._entries[token] = (float(exp), payload)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+@dataclass
+class CachedReport:
+    body: bytes
+    start: date
+    end: date
+    # Database file state the report was rendered from; see ReportCache.get
+    file_state: tuple[int, ...]
+
+class ReportCache:
+    """
+    Size-bounded LRU of rendered report bodies, keyed by (database path,
+    start date, end date, format). Committed writes drop the entries whose
+    range covers an affected last_day. A database file that changed without
+    a matching invalidate() (another process wrote to it) drops its entries
+    on the next lookup.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entry_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: OrderedDict[tuple[str, date, date, str], CachedReport] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped by every invalidate(); a report rendered across a write is not stored
+        self.generation = 0
+
+    def get(self, key: tuple[str, date, date, str], file_state: tuple[int, ...]) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.file_state != file_state:
+            self._drop_path(key[0])
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.body
+
+    def put(self, key: tuple[str, date, date, str], body: bytes, file_state: tuple[int, ...], generation: int) -> bool:
+        if generation != self.generation or len(body) > self.max_entry_bytes:
+            return False
+        self._remove(key)
+        self._entries[key] = CachedReport(body=body, start=key[1], end=key[2], file_state=file_state)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        return True
+
+    def invalidate(self, last_days: Iterable[date] | None, file_state: Callable[[str], tuple[int, ...]]) -> None:
+        """
+        After a committed write: drop entries covering any of `last_days`
+        (all of them when None), and record the new file state of the rest,
+        which the write could not have affected.
+        """
+        self.generation += 1
+        days = None if last_days is None else sorted(set(last_days))
+        for key, entry in list(self._entries.items()):
+            # First affected day on or after the entry's start, if any, must be past its end
+            i = 0 if days is None else bisect.bisect_left(days, entry.start)
+            if days is None or (i < len(days) and days[i] <= entry.end):
+                self._remove(key)
+                self.invalidations += 1
+            else:
+                entry.file_state = file_state(key[0])
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def _drop_path(self, path: str) -> None:
+        for key in [key for key in self._entries if key[0] == path]:
+            self._remove(key)
+            self.invalidations += 1
+
+    def _remove(self, key: tuple[str, date, date, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry.body)
+
+# Deactivation dates before this are the "No Existing Account" sentinel
+# (the frontend stores 1900-01-01)
+NO_ACCOUNT_CUTOFF = date(2020, 1, 1)
+
+def is_no_account(deac: Any) -> Any:
+    """
+    Whether a deactivation date is the "No Existing Account" sentinel. Takes a
+    date or a SQL column expression, so reports, late flags, the stats
+    queries and the stats triggers all apply the same comparison.
+    """
+    return deac < NO_ACCOUNT_CUTOFF
+
 def decode_deactivation_date(date: date | None) -> str | None:
     if date is None: return ""
 
-    date_str = date.strftime("%Y-%m-%d")
+    if is_no_account(date): return "No Existing Account"
+    return date.strftime("%Y-%m-%d")
+
+# Resignee deactivation date column and persisted late flag column per account
+LATE_FLAG_COLUMNS = {
+    Account.UM: ("um_date_deac", "um_late"),
+    Account.TP: ("tp_date_deac", "tp_late"),
+    Account.EM: ("email_date_deac", "email_late"),
+    Account.WN: ("windows_date_deac", "windows_late"),
+}
+
+def compute_late_flags(resigned: date, hr: datetime, deacs: Mapping[str, date | None]) -> dict[str, bool]:
+    """
+    Late flag column values for a resignee, given its deactivation dates
+    keyed by column name.
+    """
+    return {
+        flag: is_late(resigned, deacs.get(deac_column), hr, acc)
+        for acc, (deac_column, flag) in LATE_FLAG_COLUMNS.items()
+    }
 
-    if date_str < '2020-01-01': return "No Existing Account"
-    return date_str
+def refresh_late_flags(resignee: Resignee) -> None:
+    """
+    Recompute the persisted late flags on a Resignee after any of last_day,
+    date_hr_emailed or a deactivation date changed.
+    """
+    deacs = {deac_column: getattr(resignee, deac_column) for deac_column, _ in LATE_FLAG_COLUMNS.values()}
+    for flag, late in compute_late_flags(resignee.last_day, resignee.date_hr_emailed, deacs).items():
+        setattr(resignee, flag, late)
 
 def is_late(resigned: date, deac: date | None, hr: datetime, acc: Account) -> bool:
     # Tag only if account exists or account has been deactivated
-    if deac and deac > date(2020, 1, 1): 
+    if deac and not is_no_account(deac):
         resigned_d = resigned
         deac_d = deac
         hr_d = hr.date()
@@ -0,0 +1,138 @@
+# Manifest of the built frontend in static/, computed once so serving a
+# page or bundle is a dictionary lookup instead of several stat() calls.
+# Precompressed .br/.gz siblings (see `python -m src.static_assets`) are
+# served to clients that accept them.
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# SvelteKit puts content-hashed bundles here; their URLs change with their content
+IMMUTABLE_PREFIX = "_app/immutable/"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+COMPRESSIBLE_SUFFIXES = {".html", ".js", ".css", ".json", ".svg", ".txt", ".map"}
+MIN_COMPRESS_SIZE = 1024
+# Preferred first
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# Written by precompress(): source file -> content hash it was compressed from.
+# File mtimes do not survive a git checkout, so this is what detects stale variants.
+PRECOMPRESSED_INDEX = "precompressed.json"
+
+@dataclass(frozen=True)
+class StaticVariant:
+    path: str
+    # Kept so responses need no stat() of their own
+    stat: os.stat_result
+    etag: str
+
+@dataclass(frozen=True)
+class StaticAsset:
+    media_type: str
+    cache_control: str
+    # "identity" plus any precompressed encodings found next to the file
+    variants: dict[str, StaticVariant] = field(default_factory=dict)
+
+    def select(self, accept_encoding: str | None) -> tuple[str, StaticVariant]:
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in ENCODING_SUFFIXES:
+            if encoding in accepted and encoding in self.variants:
+                return encoding, self.variants[encoding]
+        return "identity", self.variants["identity"]
+
+def parse_accept_encoding(header: str | None) -> set[str]:
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip() and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+def _content_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:20]
+
+def _variant(path: Path, digest: str, tag: str) -> StaticVariant:
+    return StaticVariant(path=str(path), stat=path.stat(), etag=f'"{digest}{tag}"')
+
+def _read_precompressed_index(static_path: Path) -> dict[str, str]:
+    try:
+        return json.loads((static_path / PRECOMPRESSED_INDEX).read_text())
+    except (OSError, ValueError):
+        return {}
+
+def build_manifest(static_path: Path) -> dict[str, StaticAsset]:
+    """Map each URL path under static_path (relative, posix) to its asset."""
+    manifest: dict[str, StaticAsset] = {}
+    if not static_path.is_dir():
+        return manifest
+    compressed_from = _read_precompressed_index(static_path)
+    for root, _, files in os.walk(static_path):
+        for name in files:
+            if name == PRECOMPRESSED_INDEX or any(name.endswith(suffix) for suffix in ENCODING_SUFFIXES.values()):
+                continue
+            path = Path(root) / name
+            url_path = path.relative_to(static_path).as_posix()
+            digest = _content_hash(path)
+            variants = {"identity": _variant(path, digest, "")}
+            # A variant left over from an older build would serve the wrong content
+            if compressed_from.get(url_path) == digest:
+                for encoding, suffix in ENCODING_SUFFIXES.items():
+                    compressed = path.with_name(name + suffix)
+                    if compressed.is_file():
+                        variants[encoding] = _variant(compressed, digest, f"-{encoding}")
+            manifest[url_path] = StaticAsset(
+                media_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+                cache_control=IMMUTABLE_CACHE_CONTROL if url_path.startswith(IMMUTABLE_PREFIX) else REVALIDATE_CACHE_CONTROL,
+                variants=variants,
+            )
+    return manifest
+
+def precompress(static_path: Path) -> int:
+    """
+    Write .gz (and .br, when the brotli package is installed) next to every
+    compressible file in static_path. Run after each frontend build.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    written = 0
+    compressed_from: dict[str, str] = {}
+    for root, _, files in os.walk(static_path):
+        for name in files:
+            path = Path(root) / name
+            if path.suffix not in COMPRESSIBLE_SUFFIXES or path.stat().st_size < MIN_COMPRESS_SIZE:
+                continue
+            data = path.read_bytes()
+            outputs = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                outputs[".br"] = brotli.compress(data, quality=11)
+            for suffix, compressed in outputs.items():
+                target = path.with_name(name + suffix)
+                if len(compressed) < len(data):
+                    target.write_bytes(compressed)
+                    written += 1
+                elif target.exists():
+                    target.unlink()
+            compressed_from[path.relative_to(static_path).as_posix()] = hashlib.sha256(data).hexdigest()[:20]
+    (static_path / PRECOMPRESSED_INDEX).write_text(json.dumps(compressed_from, indent=2, sort_keys=True) + "\n")
+    return written
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parent.parent / "static"
+    print(f"Wrote {precompress(target)} precompressed files under {target}")
@@ -0,0 +1,79 @@
+# Shared fixtures: a fresh tracker database per test, an authenticated
+# in-process client for the FastAPI app, and encrypted mode on demand.
+
+import os
+
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-not-for-production-use")
+
+from dataclasses import replace
+from typing import AsyncIterator, Callable
+
+import httpx
+import pytest
+from sqlmodel import Session
+
+from benchmarks.dataset import DatasetSpec, write_rows
+from src import crypto_utils
+from src.app import app
+from src.database import EngineEntry, initialize_engine, create_db_and_tables, SQLiteProfile
+from src.migrations import encrypt_plaintext_rows
+from src.models import Account
+from src.routes import report_cache
+
+TEST_USER = "tester"
+TEST_PASSWORD = "tester"
+
+
+def clear_key_caches() -> None:
+    crypto_utils._load_key.cache_clear()
+    crypto_utils.get_fernet.cache_clear()
+    crypto_utils._blind_index_key.cache_clear()
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+def encryption(monkeypatch: pytest.MonkeyPatch):
+    """ENCRYPT_PII on with a throwaway key. Request it before `database`."""
+    from cryptography.fernet import Fernet
+
+    monkeypatch.setenv("ENCRYPT_PII", "1")
+    monkeypatch.setenv("FERNET_KEY", Fernet.generate_key().decode())
+    clear_key_caches()
+    yield
+    clear_key_caches()
+    # Pool workers hold on to the key they loaded first
+    crypto_utils.shutdown_decrypt_pool()
+
+
+@pytest.fixture
+def database(tmp_path) -> EngineEntry:
+    entry = initialize_engine(str(tmp_path / "tracker.db"), replace(SQLiteProfile.from_env(), echo=False))
+    create_db_and_tables(entry)
+    with Session(entry.engine) as session:
+        session.add(Account(username=TEST_USER, password=TEST_PASSWORD))
+        session.commit()
+    report_cache.clear()
+    return entry
+
+
+@pytest.fixture
+def add_rows(database: EngineEntry) -> Callable[..., None]:
+    """Bulk-insert synthetic resignees (see benchmarks.dataset), encrypting them in encrypted mode."""
+    def add(rows: int, **spec) -> None:
+        write_rows(database.engine, DatasetSpec(rows=rows, **spec))
+        if crypto_utils.encryption_enabled():
+            encrypt_plaintext_rows(database.engine)
+    return add
+
+
+@pytest.fixture
+async def client(database: EngineEntry) -> AsyncIterator[httpx.AsyncClient]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost:8000") as c:
+        res = await c.post("/login", data={"username": TEST_USER, "password": TEST_PASSWORD})
+        res.raise_for_status()
+        yield c
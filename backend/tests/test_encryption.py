@@ -0,0 +1,88 @@
+import csv
+import io
+
+import pytest
+from sqlmodel import Session, select
+
+from benchmarks.dataset import paste_records
+from src.crypto_utils import ENCRYPTED_FIELDS, PARALLEL_DECRYPT_THRESHOLD, blind_index, decrypt_field
+from src.models import Resignee
+from src.routes import REPORT_BATCH_SIZE
+
+pytestmark = pytest.mark.anyio
+
+# Every Fernet token starts with its version byte, base64-encoded
+FERNET_PREFIX = "gAAAAA"
+
+
+@pytest.fixture
+def encrypted_client(encryption, client):
+    return client
+
+
+def stored_rows(database) -> list[Resignee]:
+    with Session(database.engine) as session:
+        return session.exec(select(Resignee)).all()
+
+
+async def test_ingest_stores_ciphertext_and_lists_plaintext(encrypted_client, database):
+    client = encrypted_client
+    res = await client.post("/resignees", content="".join(paste_records(5)), headers={"Content-Type": "text/plain"})
+    assert res.status_code == 200
+    assert [r["employee_no"] for r in res.json()["added"]] == [f"P{i:07d}" for i in range(5)]
+
+    rows = stored_rows(database)
+    assert len(rows) == 5
+    for row in rows:
+        plain_no = decrypt_field(row.employee_no)
+        assert row.employee_no_hash == blind_index(plain_no)
+        assert all(getattr(row, field).startswith(FERNET_PREFIX) for field in ENCRYPTED_FIELDS if getattr(row, field))
+
+    listed = {r["employee_no"]: r for r in (await client.get("/resignees")).json()}
+    assert sorted(listed) == [f"P{i:07d}" for i in range(5)]
+    assert all(f"Last{i}" in listed[f"P{i:07d}"]["name"] for i in range(5))
+
+
+async def test_duplicates_are_found_through_the_blind_index(encrypted_client, database):
+    client = encrypted_client
+    body = "".join(paste_records(3))
+    assert (await client.post("/resignees", content=body, headers={"Content-Type": "text/plain"})).status_code == 200
+
+    again = (await client.post("/resignees", content=body, headers={"Content-Type": "text/plain"})).json()
+
+    assert again["added"] == []
+    assert sorted(r["employee_no"] for r in again["rejected"]) == [f"P{i:07d}" for i in range(3)]
+    assert len(stored_rows(database)) == 3
+
+
+async def test_edits_find_the_row_and_keep_remarks_encrypted(encrypted_client, database):
+    client = encrypted_client
+    await client.post("/resignees", content="".join(paste_records(2)), headers={"Content-Type": "text/plain"})
+
+    res = await client.put("/resignees/P0000001/remarks", content="Laptop returned", headers={"Content-Type": "text/plain"})
+    assert res.status_code == 200
+    assert (await client.put("/resignees/P0000001/um", content="2025-12-30", headers={"Content-Type": "text/plain"})).status_code == 200
+
+    row = next(r for r in stored_rows(database) if decrypt_field(r.employee_no) == "P0000001")
+    assert row.remarks.startswith(FERNET_PREFIX)
+    assert decrypt_field(row.remarks) == "Laptop returned"
+    listed = {r["employee_no"]: r for r in (await client.get("/resignees")).json()}
+    assert listed["P0000001"]["remarks"] == "Laptop returned"
+    assert listed["P0000000"]["remarks"] is None
+
+
+async def test_bulk_rows_are_encrypted_and_reported_in_plaintext(encrypted_client, add_rows, database):
+    # A full report batch is decrypted in the process pool, the short last one in a thread
+    rows = REPORT_BATCH_SIZE + 100
+    assert REPORT_BATCH_SIZE * len(ENCRYPTED_FIELDS) >= PARALLEL_DECRYPT_THRESHOLD > 100 * len(ENCRYPTED_FIELDS)
+    add_rows(rows, processed_ratio=1.0)
+    for row in stored_rows(database):
+        assert row.employee_no_hash == blind_index(decrypt_field(row.employee_no))
+        assert all(getattr(row, field).startswith(FERNET_PREFIX) for field in ENCRYPTED_FIELDS if getattr(row, field))
+
+    res = await encrypted_client.get("/resignees/report", params={"start_date": "2020-01-01", "end_date": "2025-12-31"})
+
+    assert res.status_code == 200
+    report = list(csv.DictReader(io.StringIO(res.text)))
+    assert sorted(line["Employee no."] for line in report) == [f"{i:08d}" for i in range(rows)]
+    assert {line["Last Name"] for line in report} == {f"Last{i}" for i in range(rows)}
@@ -0,0 +1,84 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def fetch_pages(client, limit: int, **params) -> list[list[dict]]:
+    pages = []
+    cursor = None
+    while True:
+        query = {"limit": limit, **params}
+        if cursor is not None:
+            query["cursor"] = cursor
+        res = await client.get("/resignees", params=query)
+        assert res.status_code == 200
+        pages.append(res.json())
+        cursor = res.headers.get("x-next-cursor")
+        if cursor is None:
+            return pages
+
+
+async def test_cursor_pages_cover_the_list_once_in_order(client, add_rows):
+    add_rows(300, processed_ratio=0.5)
+    everything = (await client.get("/resignees")).json()
+    assert len(everything) > 100
+
+    pages = await fetch_pages(client, limit=37)
+
+    assert all(len(page) == 37 for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= 37
+    assert [r["employee_no"] for page in pages for r in page] == [r["employee_no"] for r in everything]
+
+
+async def test_cursor_pages_with_a_filter(client, add_rows):
+    add_rows(300, processed_ratio=0.5)
+    department = (await client.get("/resignees")).json()[0]["department"]
+    filtered = (await client.get("/resignees", params={"department": department})).json()
+
+    pages = await fetch_pages(client, limit=3, department=department)
+
+    assert [r["employee_no"] for page in pages for r in page] == [r["employee_no"] for r in filtered]
+    assert all(r["department"] == department for page in pages for r in page)
+
+
+async def test_newest_hr_email_first(client, add_rows):
+    add_rows(100, processed_ratio=0.3)
+
+    rows = (await client.get("/resignees")).json()
+
+    keys = [(r["date_hr_emailed"], r["employee_no"]) for r in rows]
+    assert keys == sorted(keys, reverse=True)
+
+
+async def test_invalid_cursor_is_rejected(client, add_rows):
+    add_rows(10)
+
+    res = await client.get("/resignees", params={"limit": 5, "cursor": "not-a-cursor"})
+
+    assert res.status_code == 400
+
+
+async def test_etag_not_modified_until_a_write(client, add_rows):
+    add_rows(50, processed_ratio=0.2)
+    first = await client.get("/resignees")
+    etag = first.headers["etag"]
+
+    again = await client.get("/resignees", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+    employee_no = first.json()[0]["employee_no"]
+    assert (await client.put(f"/resignees/{employee_no}/remarks", json="called twice")).status_code == 200
+
+    changed = await client.get("/resignees", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+async def test_etag_depends_on_the_query(client, add_rows):
+    add_rows(50, processed_ratio=0.2)
+    etag = (await client.get("/resignees")).headers["etag"]
+
+    res = await client.get("/resignees", params={"limit": 5}, headers={"If-None-Match": etag})
+
+    assert res.status_code == 200
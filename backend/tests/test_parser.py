@@ -0,0 +1,98 @@
+from src.schemas import ResigneeCreate, ResigneeParseError
+from src.services import ResigneeTextParser, parse_resignee_text
+
+
+def record(employee_no: str, last_day: str = "03/15/2025", **overrides: str) -> list[str]:
+    fields = {
+        "employee_no": employee_no,
+        "date_hired": "01/02/2015",
+        "cost_center": "CC100",
+        "last_name": "Dela Cruz",
+        "first_name": "Juan",
+        "middle_name": "Santos",
+        "position_title": "Teller",
+        "rank": "Staff",
+        "department": "Branch Banking",
+        "last_day": last_day,
+        **overrides,
+    }
+    return list(fields.values())
+
+
+def paste(*records: list[str]) -> str:
+    # As HR emails arrive: every field followed by a blank line
+    return "".join(f"{field}\n\n" for fields in records for field in fields)
+
+
+def test_parses_records_in_order():
+    results = list(parse_resignee_text(paste(record("10001"), record("10002", last_day="04/30/2025"))))
+
+    assert [r.employee_no for r in results] == ["10001", "10002"]
+    assert all(isinstance(r, ResigneeCreate) for r in results)
+    assert results[1].last_day == "04/30/2025"
+    assert results[0].last_name == "Dela Cruz"
+
+
+def test_chunk_boundaries_do_not_change_the_result():
+    text = paste(record("10001"), record("10002"), record("10003"))
+    whole = list(parse_resignee_text(text))
+
+    for size in (1, 2, 7, 64):
+        parser = ResigneeTextParser()
+        chunked = [r for i in range(0, len(text), size) for r in parser.feed(text[i:i + size])]
+        chunked += list(parser.close())
+        assert chunked == whole
+
+
+def test_blank_lines_and_crlf_are_tolerated():
+    text = paste(record("10001")).replace("\n", "\r\n").replace("\r\n\r\n", "\r\n\r\n\r\n")
+
+    results = list(parse_resignee_text(text))
+
+    assert [r.employee_no for r in results] == ["10001"]
+
+
+def test_missing_field_resyncs_on_the_next_record():
+    short = record("10002")
+    del short[2]  # cost center: the record now has a date where text is expected
+
+    results = list(parse_resignee_text(paste(record("10001"), short, record("10003"))))
+
+    errors = [r for r in results if isinstance(r, ResigneeParseError)]
+    assert [r.employee_no for r in results if isinstance(r, ResigneeCreate)] == ["10001", "10003"]
+    assert len(errors) == 1
+    assert errors[0].employee_no == "10002"
+
+
+def test_extra_line_reports_one_error_and_keeps_later_records():
+    long = record("10002")
+    long.insert(5, "Jr.")
+
+    results = list(parse_resignee_text(paste(record("10001"), long, record("10003"), record("10004"))))
+
+    parsed = [r.employee_no for r in results if isinstance(r, ResigneeCreate)]
+    errors = [r for r in results if isinstance(r, ResigneeParseError)]
+    assert parsed == ["10001", "10003", "10004"]
+    assert len(errors) == 1
+
+
+def test_leading_garbage_is_one_error():
+    results = list(parse_resignee_text("Hi team,\n\nplease see below\n\n" + paste(record("10001"))))
+
+    errors = [r for r in results if isinstance(r, ResigneeParseError)]
+    assert len(errors) == 1
+    assert errors[0].field == "employee_no"
+    assert errors[0].line == 1
+    assert [r.employee_no for r in results if isinstance(r, ResigneeCreate)] == ["10001"]
+
+
+def test_incomplete_record_at_end_of_text():
+    text = paste(record("10001")) + paste(record("10002")[:4])
+
+    results = list(parse_resignee_text(text))
+
+    assert isinstance(results[0], ResigneeCreate)
+    assert isinstance(results[1], ResigneeParseError)
+    assert results[1].employee_no == "10002"
+    assert results[1].field == "first_name"
+    assert results[1].message == "Incomplete record at end of text"
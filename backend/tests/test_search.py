@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import text
+
+from benchmarks.dataset import paste_records
+from src.migrations import _add_search_index, run_migrations
+
+pytestmark = pytest.mark.anyio
+
+QUERIES = ["Last12 First12", "Last4", "teller", "Dept 3", "Last1 Mid"]
+
+
+async def search(client, q: str) -> list[str]:
+    res = await client.get("/resignees/search", params={"q": q})
+    assert res.status_code == 200, res.text
+    return [r["employee_no"] for r in res.json()]
+
+
+async def search_all(client) -> dict[str, list[str]]:
+    return {q: await search(client, q) for q in QUERIES}
+
+
+async def test_search_matches_names_and_the_last_word_as_a_prefix(client, add_rows):
+    add_rows(300)
+
+    assert await search(client, "Last12 First12") == ["00000012"]
+    assert sorted(await search(client, "last12")) == ["00000012"] + [f"{i:08d}" for i in range(120, 130)]
+    assert await search(client, "Last12 Zzz") == []
+
+
+async def test_results_survive_vacuum_and_renumbered_rowids(client, add_rows, database):
+    add_rows(300)
+    before = await search_all(client)
+    assert all(before.values())
+
+    with database.engine.begin() as conn:
+        # What VACUUM or a dump and restore may do to a table without an INTEGER PRIMARY KEY
+        conn.execute(text("UPDATE resignee SET rowid = 1000000 - rowid"))
+    with database.engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+
+    assert await search_all(client) == before
+
+
+async def test_deleted_rows_leave_the_index_and_new_rows_join_it(client, add_rows, database):
+    add_rows(50)
+    with database.engine.begin() as conn:
+        conn.execute(text("DELETE FROM resignee WHERE employee_no IN ('00000049', '00000012')"))
+        top = conn.execute(text("SELECT max(search_id) FROM resignee")).scalar()
+
+    res = await client.post("/resignees", content="".join(paste_records(3)), headers={"Content-Type": "text/plain"})
+    assert len(res.json()["added"]) == 3
+
+    assert await search(client, "Last12 First12") == []
+    assert await search(client, "Last49") == []
+    assert sorted(await search(client, "Last0 First0")) == ["00000000", "P0000000"]
+    with database.engine.connect() as conn:
+        ids = conn.execute(text("SELECT search_id FROM resignee WHERE employee_no LIKE 'P%' ORDER BY search_id")).scalars().all()
+    assert ids == [top + 1, top + 2, top + 3]
+
+
+async def test_upgrade_keys_existing_rows_on_search_id(client, add_rows, database):
+    add_rows(100)
+    with database.engine.begin() as conn:
+        # Back to the version 7 schema: index keyed on rowid, no search_id
+        _add_search_index(conn)
+        conn.execute(text("DROP INDEX ix_resignee_search_id"))
+        conn.execute(text("ALTER TABLE resignee DROP COLUMN search_id"))
+        conn.execute(text("PRAGMA user_version = 7"))
+
+    assert run_migrations(database.engine) == 8
+
+    with database.engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM resignee WHERE search_id IS NULL")).scalar() == 0
+    assert await search(client, "Last12 First12") == ["00000012"]
+
+
+async def test_encrypted_rows_index_no_names(encryption, client, add_rows):
+    add_rows(100)
+
+    assert await search(client, "Last12") == []
+    found = (await client.get("/resignees/search", params={"q": "Dept 3"})).json()
+    assert found
+    assert all(r["department"].startswith("Dept 3") for r in found)
+    assert all(r["name"].startswith("Last") for r in found)
@@ -0,0 +1,109 @@
+from collections import defaultdict
+from datetime import date
+from statistics import median
+
+import pytest
+from sqlmodel import Session, select
+
+from src.models import Resignee
+from src.routes import ACCOUNT_DATE_ATTRIBUTES, late_rate
+from src.services import compute_late_flags, is_no_account
+
+pytestmark = pytest.mark.anyio
+
+
+def account_counts(rows: list[Resignee]) -> dict:
+    """The per-account block of /resignees/stats, counted row by row."""
+    accounts = {}
+    for account, (date_attribute, late_attribute) in ACCOUNT_DATE_ATTRIBUTES.items():
+        deacs = [getattr(r, date_attribute) for r in rows]
+        deactivated = [(d - r.last_day).days for r, d in zip(rows, deacs) if d is not None and not is_no_account(d)]
+        late = sum(bool(getattr(r, late_attribute)) for r in rows)
+        accounts[account.value] = {
+            "deactivated": len(deactivated),
+            "late": late,
+            "late_rate": late_rate(late, len(deactivated)),
+            "pending": sum(d is None for d in deacs),
+            "no_account": sum(d is not None and is_no_account(d) for d in deacs),
+            "median_days_to_deactivation": round(median(deactivated), 1) if deactivated else None,
+        }
+    return accounts
+
+
+def group(key: str, rows: list[Resignee]) -> dict:
+    accounts = account_counts(rows)
+    return {
+        "key": key,
+        "resignees": len(rows),
+        "deactivated": {account: counts["deactivated"] for account, counts in accounts.items()},
+        "late": {account: counts["late"] for account, counts in accounts.items()},
+        "late_rate": {account: counts["late_rate"] for account, counts in accounts.items()},
+    }
+
+
+def brute_force_stats(database, start: date, end: date) -> dict:
+    with Session(database.engine) as session:
+        rows = [r for r in session.exec(select(Resignee)).all() if start <= r.last_day <= end]
+    by_department = defaultdict(list)
+    by_month = defaultdict(list)
+    for r in rows:
+        by_department[r.department].append(r)
+        by_month[r.last_day.strftime("%Y-%m")].append(r)
+    return {
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "resignees": len(rows),
+        "accounts": account_counts(rows),
+        "by_department": [group(key, by_department[key]) for key in sorted(by_department)],
+        "by_month": [group(key, by_month[key]) for key in sorted(by_month)],
+    }
+
+
+async def get_stats(client, start: date, end: date) -> dict:
+    res = await client.get("/resignees/stats", params={"start_date": start.isoformat(), "end_date": end.isoformat()})
+    assert res.status_code == 200, res.text
+    return res.json()
+
+
+RANGES = [
+    (date(2020, 1, 1), date(2025, 12, 31)),  # whole months only: read from the rollup
+    (date(2021, 3, 17), date(2023, 8, 9)),   # partial months at both ends
+    (date(2024, 5, 3), date(2024, 5, 20)),   # within one month
+]
+
+
+@pytest.mark.parametrize("start, end", RANGES)
+async def test_stats_match_a_brute_force_count(client, add_rows, database, start, end):
+    add_rows(1500, processed_ratio=0.6, departments=12)
+
+    assert await get_stats(client, start, end) == brute_force_stats(database, start, end)
+
+
+async def test_stats_follow_api_edits(client, add_rows, database):
+    add_rows(400, processed_ratio=0.4, departments=6)
+    pending = (await client.get("/resignees", params={"pending": "um", "limit": 3})).json()
+    assert len(pending) == 3
+
+    # A deactivation, a no-account date on the cutoff boundary and one
+    # before it, and a last day moved into another month
+    updates = [
+        {"employee_no": pending[0]["employee_no"], "account": "um", "date": "2024-05-10"},
+        {"employee_no": pending[1]["employee_no"], "account": "um", "date": "2020-01-01"},
+        {"employee_no": pending[2]["employee_no"], "account": "um", "date": "2019-12-31"},
+    ]
+    assert (await client.put("/resignees/deactivation-dates", json=updates)).status_code == 200
+    res = await client.put(
+        f"/resignees/{pending[0]['employee_no']}/last_day",
+        content="2024-05-02", headers={"Content-Type": "text/plain"},
+    )
+    assert res.status_code == 200
+
+    with Session(database.engine) as session:
+        for r in session.exec(select(Resignee)).all():
+            flags = compute_late_flags(r.last_day, r.date_hr_emailed, {
+                date_attribute: getattr(r, date_attribute) for date_attribute, _ in ACCOUNT_DATE_ATTRIBUTES.values()
+            })
+            assert flags == {late_attribute: getattr(r, late_attribute) for _, late_attribute in ACCOUNT_DATE_ATTRIBUTES.values()}
+
+    for start, end in RANGES:
+        assert await get_stats(client, start, end) == brute_force_stats(database, start, end)
@@ -18,4 +18,22 @@ export interface Employee {
   cost_center?: string;
   rank?: string;
   remarks: string;
-}
\ No newline at end of file
+}
+
+export interface RejectedEmployee {
+  employee_no: string;
+  reason: string;
+}
+
+export interface ParseError {
+  line: number;
+  employee_no: string | null;
+  field: string;
+  message: string;
+}
+
+export interface IngestResult {
+  added: Employee[];
+  rejected: RejectedEmployee[];
+  errors: ParseError[];
+}